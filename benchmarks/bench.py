@@ -0,0 +1,185 @@
+"""
+Benchmark suite for the Hotel and VirusMap hot paths.
+
+Run with ```$python -m benchmarks.bench --output results.json``` and compare with a stored
+baseline with ```--baseline baseline.json```, the run fails when a tracked metric gets
+slower than the baseline by more than the threshold.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.generators import GRID_KINDS, make_grid, make_hotel
+from main.concurrent_hotel import ConcurrentHotel
+from main.global_vars import ROOM_STATUSES
+from main.main import Hotel, VirusMap, VirusMapBfs
+from main.virus_parallel import Solver
+
+HOTEL_FLOORS = [10, 1000, 100000, 1000000]
+QUICK_HOTEL_FLOORS = [10, 1000]
+OCCUPANCIES = [0.0, 0.5, 0.9]
+GRID_SIDES = [50, 200, 500]
+QUICK_GRID_SIDES = [20, 50]
+THREAD_COUNTS = [1, 2, 4, 8]
+SOLVERS: Dict[str, Solver] = {"VirusMap": VirusMap, "VirusMapBfs": VirusMapBfs}
+
+
+def time_per_op(op: Callable[[], object], repeat: int) -> float:
+    """Mean seconds per call of op over repeat calls."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        op()
+    return (time.perf_counter() - start) / repeat
+
+
+def successes(op: Callable[[], object], repeat: int) -> int:
+    """Number of calls in a row of op assigning something (None or empty result ends the run), at most repeat."""
+    calls = 0
+    while calls < repeat and op():
+        calls += 1
+    return calls
+
+
+def bench_hotel(floors: int, occupancy: float, repeat: int) -> Dict[str, float]:
+    """
+    Seconds per op of get_room, list_available_rooms, stats, assign_block and assign_room.
+
+    Each assigning op runs on its own copy of the hotel for at most as many calls as
+    there are rooms to assign, so no sample times the full hotel path. An op that
+    cannot assign once is left out.
+    """
+    compact = floors > 100000
+    hotel = make_hotel(floors, occupancy, seed=floors, compact=compact)
+    statuses = hotel._status_buffer()
+
+    def fresh_copy() -> Hotel:
+        return Hotel(floors, bytearray(statuses), compact=compact)
+
+    rooms = [f"{floor % floors + 1}{'ABCDE'[floor % 5]}" for floor in range(repeat)]
+    lookups = iter(rooms)
+    results = {
+        "get_room": time_per_op(lambda: hotel.get_room(next(lookups)), repeat),
+        "list_available_rooms": time_per_op(
+            lambda: hotel.list_available_rooms(limit=20), repeat
+        ),
+        "stats": time_per_op(hotel.stats, repeat),
+    }
+    counting = fresh_copy()
+    blocks = successes(lambda: counting.assign_block(3), repeat)
+    if blocks:
+        blocking = fresh_copy()
+        results["assign_block"] = time_per_op(lambda: blocking.assign_block(3), blocks)
+    free_rooms = min(repeat, hotel.stats()[ROOM_STATUSES[0]])
+    if free_rooms:
+        results["assign_room"] = time_per_op(fresh_copy().assign_room, free_rooms)
+    return results
+
+
+def bench_concurrent_assign(floors: int, threads: int) -> float:
+    """Seconds per assign_room while threads share one ConcurrentHotel until it is full."""
+    hotel = ConcurrentHotel(floors, compact=True)
+    per_thread = floors * 5 // threads
+
+    def front_desk() -> None:
+        for _ in range(per_thread):
+            hotel.assign_room()
+
+    workers = [threading.Thread(target=front_desk) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (per_thread * threads)
+
+
+def bench_grid(kind: str, side: int, solver: str) -> float:
+    """Seconds to solve one map of the given kind."""
+    grid = make_grid(kind, side, side, seed=side)
+    virus_map = SOLVERS[solver](grid.m, grid.n, grid.cells)
+    start = time.perf_counter()
+    virus_map.solve()
+    return time.perf_counter() - start
+
+
+def run_suite(quick: bool = False, repeat: int = 1000) -> Dict[str, Dict]:
+    """
+    Run every benchmark, returns metrics and curves.
+
+    metrics maps "<benchmark>/<size>" to seconds per op (lower is better), curves maps
+    each benchmark to its (size, seconds per op, ops per second) points.
+    """
+    metrics: Dict[str, float] = {}
+    curves: Dict[str, List[Dict[str, float]]] = {}
+
+    def record(name: str, size: int, seconds: float) -> None:
+        metrics[f"{name}/{size}"] = seconds
+        curves.setdefault(name, []).append(
+            {"size": size, "seconds_per_op": seconds, "ops_per_second": 1 / seconds}
+        )
+
+    for floors in QUICK_HOTEL_FLOORS if quick else HOTEL_FLOORS:
+        for occupancy in OCCUPANCIES:
+            for op, seconds in bench_hotel(floors, occupancy, repeat).items():
+                record(f"Hotel.{op}[occupancy={occupancy}]", floors, seconds)
+    for threads in THREAD_COUNTS:
+        record(
+            "ConcurrentHotel.assign_room[threads]",
+            threads,
+            bench_concurrent_assign(QUICK_HOTEL_FLOORS[-1], threads),
+        )
+    for side in QUICK_GRID_SIDES if quick else GRID_SIDES:
+        for kind in GRID_KINDS:
+            for solver in SOLVERS:
+                record(
+                    f"{solver}.solve[{kind}]",
+                    side * side,
+                    bench_grid(kind, side, solver),
+                )
+    return {"metrics": metrics, "curves": curves}
+
+
+def find_regressions(
+    results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float
+) -> List[str]:
+    """Metrics slower than baseline by more than threshold (0.2 is 20%), as readable lines."""
+    regressions = []
+    for name, base in baseline["metrics"].items():
+        current = results["metrics"].get(name)
+        if current is not None and current > base * (1 + threshold):
+            regressions.append(
+                f"{name}: {current:.3e}s per op vs baseline {base:.3e}s "
+                f"(+{(current / base - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quick", action="store_true", help="only run small sizes")
+    parser.add_argument("--repeat", type=int, default=1000, help="hotel ops per size")
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    results = run_suite(args.quick, args.repeat)
+    for name, seconds in results["metrics"].items():
+        print(f"{name:60} {seconds:.3e}s per op")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Seeded synthetic hotels and infection maps for the benchmark suite"""
+import random
+from typing import List
+
+from main.global_vars import HOTEL_COLUMNS, ROOM_STATUSES
+from main.loader import Grid
+from main.main import Hotel
+
+GRID_KINDS = ["dense", "sparse", "corridor", "unreachable"]
+
+
+def make_hotel(
+    floors: int, occupancy: float, seed: int = 0, compact: bool = False
+) -> Hotel:
+    """Hotel where each room is Occupied with probability occupancy, else Available."""
+    rng = random.Random(seed)
+    statuses: List[List[str]] = [
+        [
+            ROOM_STATUSES[1] if rng.random() < occupancy else ROOM_STATUSES[0]
+            for _ in HOTEL_COLUMNS
+        ]
+        for _ in range(floors)
+    ]
+    return Hotel(floors, statuses, compact=compact)
+
+
+def make_grid(kind: str, m: int, n: int, seed: int = 0) -> Grid:
+    """
+    Infection map of the given kind.
+
+    dense: every room has a guest, a few are infected.
+    sparse: 40% of rooms have a guest, a few are infected.
+    corridor: a snake shaped corridor of guests infected from one end.
+    unreachable: dense map with a walled off wing of healthy guests, answer is -1.
+    """
+    rng = random.Random(seed)
+    if kind == "dense":
+        cells = bytearray([1]) * (m * n)
+        for _ in range(max(1, m * n // 10000)):
+            cells[rng.randrange(m * n)] = 2
+    elif kind == "sparse":
+        cells = bytearray(rng.random() < 0.4 for _ in range(m * n))
+        for _ in range(max(1, m * n // 10000)):
+            cells[rng.randrange(m * n)] = 2
+    elif kind == "corridor":
+        cells = bytearray([1]) * (m * n)
+        for row in range(1, m, 2):
+            cells[row * n : (row + 1) * n] = bytes(n)
+            cells[row * n + (n - 1 if row % 4 == 1 else 0)] = 1
+        cells[0] = 2
+    elif kind == "unreachable":
+        cells = bytearray([1]) * (m * n)
+        wall = n // 2
+        for row in range(m):
+            cells[row * n + wall] = 0
+        cells[rng.randrange(m) * n + rng.randrange(wall or 1)] = 2
+    else:
+        raise ValueError(f"grid kind must be in {GRID_KINDS}, received {kind}")
+    return Grid(m, n, cells)
@@ -0,0 +1,107 @@
+"""
+Load generator for the front desk service.
+
+Each desk client opens its own connection and loops assign -> check_out -> clean, one
+request in flight at a time, recording the round trip latency of every request.
+Run against a running service with ```$python -m benchmarks.load_client --port 8765```
+or start one in process with ```--floors 1000```.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from main.main import Hotel
+from main.service import FrontDesk, start_server
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest rank percentile of an ascending list, fraction 0.99 is p99."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+async def _desk_client(
+    host: str, port: int, cycles: int, latencies: List[float]
+) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    request_id = 0
+
+    async def call(request: Dict[str, Any]) -> Any:
+        nonlocal request_id
+        request_id += 1
+        request["id"] = request_id
+        start = time.perf_counter()
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+        return response["result"]
+
+    try:
+        for _ in range(cycles):
+            room = await call({"op": "assign"})
+            if room is None:
+                continue
+            await call({"op": "check_out", "room": room})
+            await call({"op": "clean", "room": room})
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_load(
+    host: str, port: int, clients: int = 100, cycles: int = 20
+) -> Dict[str, float]:
+    """
+    Run clients concurrent desk clients of cycles assign/check_out/clean each.
+
+    Returns the request count, requests per second and p50/p99/max latency in seconds.
+    """
+    latencies: List[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(_desk_client(host, port, cycles, latencies) for _ in range(clients))
+    )
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "requests_per_second": len(latencies) / seconds,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "max": latencies[-1] if latencies else 0.0,
+    }
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, float]:
+    if args.port is not None:
+        return await run_load(args.host, args.port, args.clients, args.cycles)
+    desk = FrontDesk(Hotel(args.floors))
+    server = await start_server(desk)
+    async with server:
+        port = server.sockets[0].getsockname()[1]
+        results = await run_load("127.0.0.1", port, args.clients, args.cycles)
+    results["batches"] = desk.batches
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="service port, default starts one")
+    parser.add_argument("--floors", type=int, default=1000, help="in process hotel")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--cycles", type=int, default=20, help="cycles per client")
+    results = asyncio.run(_main(parser.parse_args(argv)))
+    for name, value in results.items():
+        print(f"{name:20} {value:.6g}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
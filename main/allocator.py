@@ -0,0 +1,384 @@
+"""Room allocator index module"""
+from array import array
+from operator import add
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+from main.global_vars import AVAILABLE, HOTEL_COLUMNS, STATUS_CODES
+
+ROOMS_PER_FLOOR = len(HOTEL_COLUMNS)
+FULL_FLOOR_MASK = (1 << ROOMS_PER_FLOOR) - 1
+# lowest set bit position for each floor mask, -1 when the floor has no room
+_FIRST_BIT = [(mask & -mask).bit_length() - 1 for mask in range(FULL_FLOOR_MASK + 1)]
+_BIT_COUNT = [bin(mask).count("1") for mask in range(FULL_FLOOR_MASK + 1)]
+# _RUN_START[k][mask]: lowest entrance position starting k consecutive rooms of a
+# floor mask, -1 when the floor has no such run, and the same as a has-run table
+_RUN_START = [
+    [
+        next(
+            (
+                p
+                for p in range(ROOMS_PER_FLOOR - k + 1)
+                if mask >> p & (1 << k) - 1 == (1 << k) - 1
+            ),
+            -1,
+        )
+        for mask in range(FULL_FLOOR_MASK + 1)
+    ]
+    for k in range(ROOMS_PER_FLOOR + 1)
+]
+_HAS_RUN_TABLES = [
+    bytes(start >= 0 for start in starts) + bytes(256 - len(starts))
+    for starts in _RUN_START
+]
+# bytes.translate tables: bit count of a floor mask, and status code to the bit of an
+# Available room at each entrance position
+_BIT_COUNT_TABLE = bytes(_BIT_COUNT) + bytes(256 - len(_BIT_COUNT))
+_STATUS_TABLES = [
+    bytes(int(code == status) for code in range(256)) for status in STATUS_CODES
+]
+_AVAILABLE_BIT_TABLES = [
+    bytes(1 << position if code == AVAILABLE else 0 for code in range(256))
+    for position in range(ROOMS_PER_FLOOR)
+]
+
+
+class ImplicitArray(Dict[int, int]):
+    """
+    Array of int that only stores the entries differing from default(index).
+
+    Reading an entry that was never written returns default(index) without storing
+    it, so memory only tracks the entries that were written.
+
+    Parameters:
+        default <Callable[[int], int]>: value of each index that was not written
+    """
+
+    def __init__(self, default: Callable[[int], int]) -> None:
+        super().__init__()
+        self._default = default
+
+    def __missing__(self, index: int) -> int:
+        return self._default(index)
+
+    def to_bytearray(self, length: int) -> bytearray:
+        """Dense copy of the first length entries, for a constant default that fits in a byte."""
+        dense = bytearray((self._default(0),)) * length
+        for index, value in self.items():
+            dense[index] = value
+        return dense
+
+
+# status code buffer of a Hotel, dense or lazy
+StatusStore = Union[bytearray, ImplicitArray]
+
+
+def entrance_position(slot: int) -> int:
+    """Position of a room inside its floor counted from the entrance side.
+
+    Odd floors (index 0, 2, ...) run A -> E and even floors run E -> A.
+    """
+    floor, col = divmod(slot, ROOMS_PER_FLOOR)
+    if floor % 2:
+        return ROOMS_PER_FLOOR - 1 - col
+    return col
+
+
+def slot_of(floor: int, position: int) -> int:
+    """Inverse of entrance_position, floor is 0 based."""
+    if floor % 2:
+        return floor * ROOMS_PER_FLOOR + ROOMS_PER_FLOOR - 1 - position
+    return floor * ROOMS_PER_FLOOR + position
+
+
+class FenwickTree:
+    """
+    Binary indexed tree over per floor counters.
+
+    Parameters:
+        size <int>: number of floors
+
+        values <List[int]>: initial counter of each floor
+    """
+
+    _tree: Union[array, ImplicitArray]
+
+    def __init__(self, size: int, values: Sequence[int]) -> None:
+        self.size = size
+        tree = array("q", bytes(8 * (size + 1)))
+        # level holds the sums of aligned blocks of step counters, node i with lowbit
+        # step covers the block ending at i, so a whole lowbit level is one slice copy
+        level = array("q")
+        level.extend(values)
+        step = 1
+        while step <= size:
+            tree[step :: 2 * step] = level[::2]
+            level = array("q", map(add, level[::2], level[1::2]))
+            step *= 2
+        self._tree = tree
+        self._top_step = 1 << (size.bit_length() - 1)
+
+    @classmethod
+    def uniform(cls, size: int, value: int) -> "FenwickTree":
+        """Tree where every counter starts at value, node i then covers lowbit(i) counters."""
+        tree = cls.__new__(cls)
+        tree.size = size
+        tree._tree = array("q", [value * (i & -i) for i in range(size + 1)])
+        tree._top_step = 1 << (size.bit_length() - 1)
+        return tree
+
+    @classmethod
+    def implicit(cls, size: int, value: int) -> "FenwickTree":
+        """Same as uniform in O(1), only the nodes updated by add are stored."""
+        tree = cls.__new__(cls)
+        tree.size = size
+        tree._tree = ImplicitArray(lambda i: value * (i & -i))
+        tree._top_step = 1 << (size.bit_length() - 1)
+        return tree
+
+    def add(self, index: int, delta: int) -> None:
+        """Add delta to the counter of 0 based index."""
+        i = index + 1
+        tree = self._tree
+        while i <= self.size:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, count: int) -> int:
+        """Sum of the first count counters."""
+        total = 0
+        tree = self._tree
+        i = count
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, k: int) -> int:
+        """Smallest 0 based index whose prefix sum (inclusive) reaches k, k >= 1."""
+        pos = 0
+        step = self._top_step
+        tree = self._tree
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and tree[nxt] < k:
+                pos = nxt
+                k -= tree[nxt]
+            step >>= 1
+        return pos
+
+
+class AvailabilityIndex:
+    """
+    Index of Available rooms kept in entrance distance order.
+
+    Each floor keeps a 5 bit mask of its Available rooms in entrance order, and a
+    Fenwick tree over the per floor counts finds the nearest floor with a free room,
+    so every lookup and update is O(log M).
+
+    Parameters:
+        floor_count <int>: number of floor
+
+        statuses <bytearray>: status code of each room, floor major and column A-E
+    """
+
+    _masks: Union[bytearray, ImplicitArray]
+
+    def __init__(self, floor_count: int, statuses: bytearray) -> None:
+        self.floor_count = floor_count
+        # k -> Fenwick tree of floors having k adjacent Available rooms, see first_run
+        self._run_trees: Dict[int, FenwickTree] = {}
+        self._total = statuses.count(AVAILABLE)
+        if self._total == floor_count * ROOMS_PER_FLOOR:
+            self._masks = bytearray((FULL_FLOOR_MASK,)) * floor_count
+            self._counts = FenwickTree.uniform(floor_count, ROOMS_PER_FLOOR)
+            return
+        masks = bytearray(floor_count)
+        stride = 2 * ROOMS_PER_FLOOR
+        # odd floors (index 0, 2, ...) then even floors, one column at a time
+        for parity in (0, 1):
+            floors = len(range(parity, floor_count, 2))
+            combined = 0
+            for col in range(ROOMS_PER_FLOOR):
+                position = ROOMS_PER_FLOOR - 1 - col if parity else col
+                column = statuses[parity * ROOMS_PER_FLOOR + col :: stride]
+                bits = column.translate(_AVAILABLE_BIT_TABLES[position])
+                combined |= int.from_bytes(bits, "little")
+            masks[parity::2] = combined.to_bytes(floors, "little")
+        self._masks = masks
+        self._counts = FenwickTree(floor_count, masks.translate(_BIT_COUNT_TABLE))
+
+    @classmethod
+    def implicit(cls, floor_count: int) -> "AvailabilityIndex":
+        """Index of an all Available hotel in O(1), untouched floors stay implicit."""
+        index = cls.__new__(cls)
+        index.floor_count = floor_count
+        index._run_trees = {}
+        index._total = floor_count * ROOMS_PER_FLOOR
+        index._masks = ImplicitArray(lambda floor: FULL_FLOOR_MASK)
+        index._counts = FenwickTree.implicit(floor_count, ROOMS_PER_FLOOR)
+        return index
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __contains__(self, slot: int) -> bool:
+        floor = slot // ROOMS_PER_FLOOR
+        return bool(self._masks[floor] >> entrance_position(slot) & 1)
+
+    def add(self, slot: int) -> None:
+        """Mark room slot as Available, no-op if it is already indexed."""
+        floor = slot // ROOMS_PER_FLOOR
+        bit = 1 << entrance_position(slot)
+        if self._masks[floor] & bit:
+            return
+        mask = self._masks[floor]
+        self._masks[floor] = mask | bit
+        self._counts.add(floor, 1)
+        self._total += 1
+        if self._run_trees:
+            self._update_runs(floor, mask, mask | bit)
+
+    def discard(self, slot: int) -> None:
+        """Remove room slot from the index, no-op if it is not indexed."""
+        floor = slot // ROOMS_PER_FLOOR
+        bit = 1 << entrance_position(slot)
+        if not self._masks[floor] & bit:
+            return
+        mask = self._masks[floor]
+        self._masks[floor] = mask & ~bit
+        self._counts.add(floor, -1)
+        self._total -= 1
+        if self._run_trees:
+            self._update_runs(floor, mask, mask & ~bit)
+
+    def _update_runs(self, floor: int, old_mask: int, new_mask: int) -> None:
+        for k, tree in self._run_trees.items():
+            delta = _HAS_RUN_TABLES[k][new_mask] - _HAS_RUN_TABLES[k][old_mask]
+            if delta:
+                tree.add(floor, delta)
+
+    def first(self) -> Optional[int]:
+        """Slot of the Available room nearest to the entrance or None."""
+        if not self._total:
+            return None
+        floor = self._counts.find(1)
+        return slot_of(floor, _FIRST_BIT[self._masks[floor]])
+
+    def first_run(self, k: int) -> Optional[int]:
+        """
+        Slot of the first room of the nearest run of k adjacent Available rooms on one floor, or None.
+
+        A Fenwick tree over "floor has a run of k" is built on the first call for each
+        k and kept up to date by add and discard, so each call is O(log M).
+        """
+        if not 1 <= k <= ROOMS_PER_FLOOR or self._total < k:
+            return None
+        tree = self._counts if k == 1 else self._run_tree(k)
+        if not tree.prefix(self.floor_count):
+            return None
+        floor = tree.find(1)
+        return slot_of(floor, _RUN_START[k][self._masks[floor]])
+
+    def _run_tree(self, k: int) -> FenwickTree:
+        tree = self._run_trees.get(k)
+        if tree is not None:
+            return tree
+        masks = self._masks
+        if isinstance(masks, ImplicitArray):
+            tree = FenwickTree.implicit(self.floor_count, 1)
+            for floor, mask in masks.items():
+                if not _HAS_RUN_TABLES[k][mask]:
+                    tree.add(floor, -1)
+        else:
+            tree = FenwickTree(self.floor_count, masks.translate(_HAS_RUN_TABLES[k]))
+        self._run_trees[k] = tree
+        return tree
+
+    def iter_slots(self, offset: int = 0) -> Iterator[int]:
+        """Lazily yield Available room slots in entrance order, skipping the first offset rooms."""
+        if offset < 0:
+            offset = 0
+        if offset >= self._total:
+            return
+        masks = self._masks
+        counts = self._counts
+        floor = counts.find(offset + 1)
+        # rooms of this floor that belong to the skipped offset
+        skip = offset - counts.prefix(floor)
+        seen = offset - skip
+        while True:
+            mask = masks[floor]
+            seen += _BIT_COUNT[mask]
+            while mask:
+                position = _FIRST_BIT[mask]
+                mask &= mask - 1
+                if skip:
+                    skip -= 1
+                    continue
+                yield slot_of(floor, position)
+            if seen >= self._total:
+                return
+            floor = counts.find(seen + 1)
+
+    def iter_slots_after(self, slot: int) -> Iterator[int]:
+        """Lazily yield Available room slots in entrance order that come after slot, whether slot is Available or not."""
+        floor = slot // ROOMS_PER_FLOOR
+        # positions up to slot on its floor, in entrance order
+        up_to = (2 << entrance_position(slot)) - 1
+        rank = self._counts.prefix(floor) + _BIT_COUNT[self._masks[floor] & up_to]
+        return self.iter_slots(rank)
+
+
+class StatusCounts:
+    """
+    Number of rooms in each status code, per floor and for the whole hotel.
+
+    Parameters:
+        floor_count <int>: number of floor
+
+        statuses <bytearray>: status code of each room, floor major and column A-E
+    """
+
+    _per_floor: Union[bytearray, ImplicitArray]
+
+    def __init__(self, floor_count: int, statuses: bytearray) -> None:
+        self.totals = [statuses.count(code) for code in STATUS_CODES]
+        # 4 counters per floor, a floor has at most 5 rooms in a status so a byte is enough
+        per_floor = bytearray(floor_count * len(STATUS_CODES))
+        for code in STATUS_CODES:
+            # column counts never exceed 5, so adding them as big ints never carries
+            combined = sum(
+                int.from_bytes(
+                    statuses[col::ROOMS_PER_FLOOR].translate(_STATUS_TABLES[code]),
+                    "little",
+                )
+                for col in range(ROOMS_PER_FLOOR)
+            )
+            per_floor[code :: len(STATUS_CODES)] = combined.to_bytes(
+                floor_count, "little"
+            )
+        self._per_floor = per_floor
+
+    @classmethod
+    def implicit(cls, floor_count: int) -> "StatusCounts":
+        """Counters of an all Available hotel in O(1), untouched floors stay implicit."""
+        counts = cls.__new__(cls)
+        counts.totals = [0] * len(STATUS_CODES)
+        counts.totals[AVAILABLE] = floor_count * ROOMS_PER_FLOOR
+        counts._per_floor = ImplicitArray(
+            lambda i: ROOMS_PER_FLOOR if i % len(STATUS_CODES) == AVAILABLE else 0
+        )
+        return counts
+
+    def move(self, slot: int, old: int, new: int) -> None:
+        """Count room slot under status code new instead of old."""
+        base = slot // ROOMS_PER_FLOOR * len(STATUS_CODES)
+        self._per_floor[base + old] -= 1
+        self._per_floor[base + new] += 1
+        self.totals[old] -= 1
+        self.totals[new] += 1
+
+    def floor(self, floor: int) -> List[int]:
+        """Count of each status code on 0 based floor."""
+        base = floor * len(STATUS_CODES)
+        return [self._per_floor[base + code] for code in STATUS_CODES]
@@ -0,0 +1,229 @@
+"""Thread safe Hotel module"""
+import threading
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Union, cast
+
+from main import instrumentation
+from main.allocator import ROOMS_PER_FLOOR, AvailabilityIndex, StatusCounts
+from main.global_vars import AVAILABLE, OCCUPIED, ROOM_STATUSES
+from main.loader import GridBuffer
+from main.main import Hotel, Room, room_number
+
+# Available rooms read from a stripe per lock acquisition while iterating
+_ITER_CHUNK = 256
+
+
+class _LockedRoom(Room):
+    """Room view whose transitions run under the lock of its floor stripe."""
+
+    __slots__ = ()
+
+    def _lock(self) -> threading.Lock:
+        return cast("ConcurrentHotel", self._hotel)._lock_of(self._slot)
+
+    def check_in(self) -> bool:
+        with self._lock():
+            return super().check_in()
+
+    def check_out(self) -> bool:
+        with self._lock():
+            return super().check_out()
+
+    def clean(self) -> bool:
+        with self._lock():
+            return super().clean()
+
+    def repair(self) -> bool:
+        with self._lock():
+            return super().repair()
+
+    def repaired(self) -> bool:
+        with self._lock():
+            return super().repaired()
+
+
+class ConcurrentHotel(Hotel):
+    """
+    Hotel that can be shared between threads, every room is assigned exactly once.
+
+    Floors are split into lock_count stripes of consecutive floors, each stripe owns a
+    lock and an AvailabilityIndex of its own rooms. A room status only changes while
+    the lock of its stripe is held, so a check-then-check_in can not race, and threads
+    working on different stripes never wait for each other. assign_room scans the
+    stripes from the entrance and claims the nearest Available room of the first
+    stripe that still has one.
+
+    Parameters:
+        m_floors <int>: number of floor
+
+        rooms_w_status <List[List[str]] | bytes>: floor matrix with each room set with user defined status, or flat buffer of 5 status codes per floor (optional, default to all Available)
+
+        compact <bool>: only keep the status code buffer and create Room views on demand (optional, default to False)
+
+        lock_count <int>: number of floor stripes, each with its own lock (optional, default to 64)
+    """
+
+    _room_type = _LockedRoom
+
+    def __init__(
+        self,
+        m_floors: int,
+        rooms_w_status: Union[List[List[str]], GridBuffer, None] = None,
+        compact: bool = False,
+        lock_count: int = 64,
+    ) -> None:
+        self._lock_count = max(1, lock_count)
+        super().__init__(m_floors, rooms_w_status, compact)
+
+    def _index_rooms(self, statuses: bytearray) -> None:
+        stripe_floors = -(-self.floor_count // self._lock_count)
+        # a stripe must start on an odd floor so its rooms keep their entrance order
+        stripe_floors += stripe_floors % 2
+        self._stripe_slots = stripe_floors * ROOMS_PER_FLOOR
+        self._indexes = [
+            AvailabilityIndex(
+                min(stripe_floors, self.floor_count - floor),
+                statuses[
+                    floor * ROOMS_PER_FLOOR : (floor + stripe_floors) * ROOMS_PER_FLOOR
+                ],
+            )
+            for floor in range(0, self.floor_count, stripe_floors)
+        ]
+        self._stripe_counts = [
+            StatusCounts(
+                min(stripe_floors, self.floor_count - floor),
+                statuses[
+                    floor * ROOMS_PER_FLOOR : (floor + stripe_floors) * ROOMS_PER_FLOOR
+                ],
+            )
+            for floor in range(0, self.floor_count, stripe_floors)
+        ]
+        self._locks = [threading.Lock() for _ in self._indexes]
+
+    def _lock_of(self, slot: int) -> threading.Lock:
+        return self._locks[slot // self._stripe_slots]
+
+    def _on_transition(self, slot: int, old: int, new: int) -> None:
+        """Called with the stripe lock held after a room status code changed from old to new."""
+        stripe, local = divmod(slot, self._stripe_slots)
+        index = self._indexes[stripe]
+        if old == AVAILABLE:
+            index.discard(local)
+        if new == AVAILABLE:
+            index.add(local)
+        self._stripe_counts[stripe].move(local, old, new)
+        if self._log is not None:
+            self._log.record(slot, new)
+
+    def stats(self, floor: Optional[int] = None) -> Dict[str, int]:
+        """
+        Number of rooms in each status, for the whole hotel or one floor.
+
+        Counters are read without locking, the hotel wide sum adds one counter per
+        stripe and may mix stripes read before and after a concurrent transition.
+        """
+        if floor is None:
+            totals = [
+                sum(codes) for codes in zip(*(c.totals for c in self._stripe_counts))
+            ]
+            return dict(zip(ROOM_STATUSES, totals))
+        stripe, local = divmod(
+            self._floor_index(floor) * ROOMS_PER_FLOOR, self._stripe_slots
+        )
+        counts = self._stripe_counts[stripe].floor(local // ROOMS_PER_FLOOR)
+        return dict(zip(ROOM_STATUSES, counts))
+
+    def assign_room(self) -> Union[str, None]:
+        """Assign Available room nearest to the hotel entrance. Will return room number or None if no Available room."""
+        for stripe, index in enumerate(self._indexes):
+            # unlocked emptiness check, a stale answer is settled under the lock
+            if not len(index):
+                continue
+            with self._locks[stripe]:
+                local = index.first()
+                if local is None:
+                    continue
+                slot = stripe * self._stripe_slots + local
+                self._statuses[slot] = OCCUPIED
+                self._on_transition(slot, AVAILABLE, OCCUPIED)
+            return room_number(slot)
+        return None
+
+    def assign_block(self, k: int) -> List[str]:
+        """Assign the nearest to the hotel entrance run of k adjacent Available rooms on one floor, in the floor direction. Will return the room numbers in order or an empty list if no floor has such a run."""
+        for stripe, index in enumerate(self._indexes):
+            if len(index) < k:
+                continue
+            with self._locks[stripe]:
+                local = index.first_run(k)
+                if local is None:
+                    continue
+                return self._claim_run(stripe * self._stripe_slots + local, k)
+        return []
+
+    def assign_rooms(self, k: int) -> List[str]:
+        """Assign up to k Available rooms nearest to the hotel entrance. Will return the assigned room numbers in order."""
+        slots: List[int] = []
+        for stripe, index in enumerate(self._indexes):
+            if len(slots) >= k:
+                break
+            if not len(index):
+                continue
+            base = stripe * self._stripe_slots
+            with self._locks[stripe]:
+                claimed = list(islice(index.iter_slots(), k - len(slots)))
+                for local in claimed:
+                    self._statuses[base + local] = OCCUPIED
+                    self._on_transition(base + local, AVAILABLE, OCCUPIED)
+            slots.extend(base + local for local in claimed)
+        return [room_number(slot) for slot in slots]
+
+    def iter_available_rooms(self, offset: int = 0) -> Iterator[str]:
+        """
+        Lazily yield Available room number from closest to furthest room from the hotel entrance.
+
+        Rooms are read a chunk at a time under the stripe lock, rooms changing status
+        while iterating may or may not be seen. Each chunk resumes after the last room
+        yielded, so no room is yielded twice.
+        """
+        skip = max(offset, 0)
+        for stripe, index in enumerate(self._indexes):
+            base = stripe * self._stripe_slots
+            last = None
+            while True:
+                with self._locks[stripe]:
+                    if last is not None:
+                        slots = index.iter_slots_after(last)
+                    elif skip >= len(index):
+                        skip -= len(index)
+                        break
+                    else:
+                        slots, skip = index.iter_slots(skip), 0
+                    chunk = list(islice(slots, _ITER_CHUNK))
+                for local in chunk:
+                    yield room_number(base + local)
+                if len(chunk) < _ITER_CHUNK:
+                    break
+                last = chunk[-1]
+
+    def _transition_many(self, nums: Iterable[str], old: int, new: int) -> List[bool]:
+        statuses = self._statuses
+        results = []
+        for num in nums:
+            slot = self._find_slot(num)
+            if slot is None:
+                results.append(False)
+                continue
+            with self._lock_of(slot):
+                if statuses[slot] != old:
+                    results.append(False)
+                    continue
+                statuses[slot] = new
+                self._on_transition(slot, old, new)
+            results.append(True)
+        return results
+
+
+instrumentation.register_timed(
+    ConcurrentHotel, "assign_room", "assign_rooms", "assign_block", "stats"
+)
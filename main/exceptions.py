@@ -56,3 +56,28 @@ class RepairedException(Exception):
         super().__init__(
             f"Room status must be {ROOM_STATUSES[3]} to be {ROOM_STATUSES[2]}"
         )
+
+
+class GridSizeException(Exception):
+    def __init__(self, detail: str) -> None:
+        super().__init__(f"Invalid map size, {detail}")
+
+
+class GridValueException(Exception):
+    def __init__(self, row: int, value) -> None:
+        super().__init__(f"Room value must be 0, 1 or 2, row {row} got {value!r}")
+
+
+class SnapshotException(Exception):
+    def __init__(self, detail: str) -> None:
+        super().__init__(f"Invalid hotel snapshot or log, {detail}")
+
+
+class ReservationException(Exception):
+    def __init__(self, detail: str) -> None:
+        super().__init__(f"Invalid reservation, {detail}")
+
+
+class WorkerException(Exception):
+    def __init__(self, detail: str) -> None:
+        super().__init__(f"Solver worker failed, {detail}")
@@ -1,3 +1,7 @@
 HOTEL_COLUMNS = ["A", "B", "C", "D", "E"]
+COLUMN_INDEX = {col: i for i, col in enumerate(HOTEL_COLUMNS)}
 ROOM_STATUSES = ["Available", "Occupied", "Vacant", "Repair"]
-DEBUGGING = True
+# compact status codes, index into ROOM_STATUSES
+AVAILABLE, OCCUPIED, VACANT, REPAIR = range(len(ROOM_STATUSES))
+ROOM_STATUS_CODE = {status: code for code, status in enumerate(ROOM_STATUSES)}
+STATUS_CODES = bytes(range(len(ROOM_STATUSES)))
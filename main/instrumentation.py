@@ -0,0 +1,128 @@
+"""
+Instrumentation module.
+
+Counters, latency histograms and per unit_time series for the Hotel and VirusMap hot
+paths. Nothing is measured until enable() is called or the TELEPATHY_INSTRUMENT
+environment variable is set to a non empty value other than "0": timed methods are
+only wrapped while instrumentation is enabled, and solvers check the active
+Instrumentation once per solve.
+"""
+import functools
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ENV_VAR = "TELEPATHY_INSTRUMENT"
+
+# the enabled Instrumentation, None when disabled
+active: Optional["Instrumentation"] = None
+
+# (owner class, method name, original function) of every timed method
+_timed_methods: List[Tuple[type, str, Callable]] = []
+
+
+class Histogram:
+    """Latency histogram with power of 2 microsecond buckets."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        # bucket i counts latencies in [2 ** (i - 1), 2 ** i) microseconds
+        self.buckets: Dict[int, int] = {}
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        bucket = int(seconds * 1e6).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "buckets_us": {2**i: n for i, n in sorted(self.buckets.items())},
+        }
+
+
+class Instrumentation:
+    """Collector for counters, latency histograms and series of values."""
+
+    def __init__(self) -> None:
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.series: Dict[str, List[float]] = {}
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, seconds: float) -> None:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+    def append(self, name: str, value: float) -> None:
+        self.series.setdefault(name, []).append(value)
+
+    def reset(self) -> None:
+        self.counters.clear()
+        self.histograms.clear()
+        self.series.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "counters": dict(self.counters),
+            "histograms": {k: v.as_dict() for k, v in self.histograms.items()},
+            "series": {k: list(v) for k, v in self.series.items()},
+        }
+
+
+def _timed(name: str, func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if active is not None:
+                active.observe(name, time.perf_counter() - start)
+
+    return wrapper
+
+
+def register_timed(owner: type, *names: str) -> None:
+    """Record the latency of owner methods in a histogram named "<owner>.<method>" while enabled."""
+    for name in names:
+        original = getattr(owner, name)
+        _timed_methods.append((owner, name, original))
+        if active is not None:
+            setattr(owner, name, _timed(f"{owner.__name__}.{name}", original))
+
+
+def enable(instrumentation: Optional[Instrumentation] = None) -> Instrumentation:
+    """Start collecting into instrumentation (a new one by default), returns it."""
+    global active
+    if active is None:
+        for owner, name, original in _timed_methods:
+            setattr(owner, name, _timed(f"{owner.__name__}.{name}", original))
+    active = instrumentation or Instrumentation()
+    return active
+
+
+def disable() -> Optional[Instrumentation]:
+    """Stop collecting and restore the timed methods, returns the Instrumentation that was active."""
+    global active
+    for owner, name, original in _timed_methods:
+        setattr(owner, name, original)
+    previous, active = active, None
+    return previous
+
+
+if os.environ.get(ENV_VAR, "0") not in ("", "0"):
+    enable()
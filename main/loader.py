@@ -0,0 +1,167 @@
+"""Streaming infection map loader module"""
+import mmap
+import os
+import struct
+import sys
+from typing import BinaryIO, Iterable, List, NamedTuple, Tuple, TypeGuard, Union
+
+from main.exceptions import GridSizeException, GridValueException
+
+# binary map layout: magic, uint32 M, uint32 N, then M x N room bytes row by row
+BINARY_MAGIC = b"VMAP"
+BINARY_HEADER = struct.Struct("<4sII")
+ROOM_VALUES = b"\x00\x01\x02"
+_TEXT_TO_CODE = bytes.maketrans(b"012", ROOM_VALUES)
+_CHUNK_SIZE = 1 << 20
+
+GridBuffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+class Grid(NamedTuple):
+    """
+    Infection map held as a flat buffer of room values.
+
+    Parameters:
+        m <int>: number of row
+
+        n <int>: number of column
+
+        cells <bytearray | memoryview>: M x N room values (0, 1, 2) row by row
+    """
+
+    m: int
+    n: int
+    cells: GridBuffer
+
+
+def is_grid_buffer(matrix: object) -> TypeGuard[GridBuffer]:
+    """True if matrix is a flat buffer of room values instead of a list of rows."""
+    return isinstance(matrix, (bytes, bytearray, memoryview, mmap.mmap))
+
+
+def grid_rows(m: int, n: int, cells: GridBuffer) -> List[bytearray]:
+    """Split a flat buffer into mutable bytearray rows, indexable like a list of lists."""
+    return [bytearray(cells[row * n : (row + 1) * n]) for row in range(m)]
+
+
+def _parse_size(line: bytes) -> Tuple[int, int]:
+    tokens = line.split()
+    if len(tokens) != 2 or not all(token.isdigit() for token in tokens):
+        raise GridSizeException(f"first line must be 'M N', got {line!r}")
+    m, n = int(tokens[0]), int(tokens[1])
+    if m < 1 or n < 1:
+        raise GridSizeException(f"M and N must be at least 1, got {m} {n}")
+    return m, n
+
+
+def _parse_row(line: bytes, n: int, row: int) -> bytes:
+    """Convert a text row of N space separated room values into N bytes."""
+    line = line.strip()
+    if len(line) == 2 * n - 1 and line[1::2] == b" " * (n - 1):
+        cells = line[0::2]
+    else:
+        tokens = line.split()
+        if len(tokens) != n:
+            raise GridSizeException(f"row {row} must have {n} rooms, got {len(tokens)}")
+        cells = b"".join(tokens)
+        if len(cells) != n:
+            raise GridValueException(row, line)
+    invalid = cells.translate(None, b"012")
+    if invalid:
+        raise GridValueException(row, invalid[:1].decode(errors="replace"))
+    return cells.translate(_TEXT_TO_CODE)
+
+
+def read_text_grid(lines: Iterable[Union[str, bytes]], sentinel: str = "#") -> Grid:
+    """
+    Stream a text map into a flat buffer, validating size and room values row by row.
+
+    The first non blank line is "M N", followed by M rows of N space separated values.
+    Reading stops after M rows, at the sentinel line or at the end of lines.
+    """
+    stop = sentinel.encode()
+    m = n = 0
+    cells = bytearray()
+    row = 0
+    for raw in lines:
+        line = raw.encode() if isinstance(raw, str) else raw
+        if line.strip() == stop:
+            break
+        if not m:
+            if line.strip():
+                m, n = _parse_size(line)
+            continue
+        row += 1
+        if row > m:
+            raise GridSizeException(f"expected {m} rows, got more")
+        cells += _parse_row(line, n, row)
+        if row == m:
+            break
+    if not m:
+        raise GridSizeException("missing 'M N' line")
+    if row != m:
+        raise GridSizeException(f"expected {m} rows, got {row}")
+    return Grid(m, n, cells)
+
+
+def _validate_buffer(cells: GridBuffer, n: int) -> None:
+    for offset in range(0, len(cells), _CHUNK_SIZE):
+        chunk = bytes(cells[offset : offset + _CHUNK_SIZE])
+        invalid = chunk.translate(None, ROOM_VALUES)
+        if invalid:
+            position = offset + chunk.index(invalid[0])
+            raise GridValueException(position // n + 1, invalid[0])
+
+
+def read_binary_grid(data: GridBuffer) -> Grid:
+    """Wrap a binary map without copying the room bytes, validating header and values."""
+    view = memoryview(data)
+    if len(view) < BINARY_HEADER.size:
+        raise GridSizeException("binary map header is truncated")
+    magic, m, n = BINARY_HEADER.unpack(view[: BINARY_HEADER.size])
+    if magic != BINARY_MAGIC:
+        raise GridSizeException(f"binary map must start with {BINARY_MAGIC!r}")
+    if m < 1 or n < 1:
+        raise GridSizeException(f"M and N must be at least 1, got {m} {n}")
+    cells = view[BINARY_HEADER.size :]
+    if len(cells) != m * n:
+        raise GridSizeException(f"expected {m * n} rooms, got {len(cells)}")
+    _validate_buffer(cells, n)
+    return Grid(m, n, cells)
+
+
+def write_binary_grid(path: Union[str, os.PathLike], grid: Grid) -> None:
+    """Write grid in the compact binary layout read by load_grid."""
+    with open(path, "wb") as f:
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, grid.m, grid.n))
+        f.write(grid.cells)
+
+
+def _read_stream(stream: BinaryIO) -> Grid:
+    head = stream.peek(len(BINARY_MAGIC)) if hasattr(stream, "peek") else b""
+    if head[: len(BINARY_MAGIC)] == BINARY_MAGIC:
+        return read_binary_grid(stream.read())
+    return read_text_grid(stream)
+
+
+def load_grid(source: Union[str, os.PathLike, BinaryIO, None] = None) -> Grid:
+    """
+    Load a text or binary infection map into a flat buffer.
+
+    Parameters:
+        source <str | PathLike | file>: path of the map, "-" or None for stdin, or an opened file
+
+    A binary map path is memory mapped, so its rooms are validated and solved in place
+    without ever being copied into Python lists.
+    """
+    if source is None or source == "-":
+        return _read_stream(sys.stdin.buffer)
+    if not isinstance(source, (str, os.PathLike)):
+        stream = getattr(source, "buffer", source)
+        return _read_stream(stream)
+    with open(source, "rb") as f:
+        if f.read(len(BINARY_MAGIC)) == BINARY_MAGIC:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return read_binary_grid(mapped)
+        f.seek(0)
+        return read_text_grid(f)
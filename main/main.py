@@ -1,8 +1,35 @@
 import logging
-import re
-from typing import List, Tuple, Union
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import Counter, deque
+from itertools import islice
+from typing import (
+    TYPE_CHECKING,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableSequence,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
 
 
+from main import components, instrumentation
+from main.allocator import (
+    ROOMS_PER_FLOOR,
+    AvailabilityIndex,
+    ImplicitArray,
+    StatusCounts,
+    StatusStore,
+    entrance_position,
+    slot_of,
+)
 from main.exceptions import (
     CheckInException,
     CheckOutException,
@@ -13,12 +40,21 @@ from main.exceptions import (
     RoomCountException,
     RoomStatusException,
 )
-from main.global_vars import DEBUGGING, ROOM_STATUSES, HOTEL_COLUMNS
+from main.loader import GridBuffer, grid_rows, is_grid_buffer
+from main.global_vars import (
+    AVAILABLE,
+    COLUMN_INDEX,
+    HOTEL_COLUMNS,
+    OCCUPIED,
+    REPAIR,
+    ROOM_STATUS_CODE,
+    ROOM_STATUSES,
+    STATUS_CODES,
+    VACANT,
+)
 
-if DEBUGGING:
-    logging.basicConfig(level=logging.DEBUG)
-else:
-    logging.basicConfig(level=logging.INFO)
+if TYPE_CHECKING:
+    from main.persistence import TransitionLog
 
 
 class Room:
@@ -30,58 +66,89 @@ class Room:
         number <str>: room number, format is {i}{j} where i is floor number (1-M) and j is room column (A-E).
 
         status <str>: room status, acceptable values are "Available", "Occupied", "Vacant", "Repair".
+
+    A Room is a view over one slot of a status code buffer, a standalone Room owns a
+    buffer of 1 slot while the rooms of a Hotel share the Hotel buffer.
     """
 
+    __slots__ = ("_number", "_store", "_slot", "_hotel")
+
     def __init__(self, number: str, status: str = ROOM_STATUSES[0]) -> None:
         if status not in ROOM_STATUSES:
             raise RoomStatusException(status=status)
-        self._number = number
-        self._status = status
+        self._number: Optional[str] = number
+        self._store: StatusStore = bytearray((ROOM_STATUS_CODE[status],))
+        self._slot = 0
+        self._hotel: Optional["Hotel"] = None
+
+    @classmethod
+    def _view(cls, store: StatusStore, slot: int, hotel: "Hotel") -> "Room":
+        """Create a Room over slot of a Hotel status buffer, room number is derived lazily."""
+        room = cls.__new__(cls)
+        room._number = None
+        room._store = store
+        room._slot = slot
+        room._hotel = hotel
+        return room
 
     @property
     def number(self) -> str:
+        if self._number is None:
+            self._number = room_number(self._slot)
         return self._number
 
     @property
     def status(self) -> str:
-        return self._status
+        return ROOM_STATUSES[self._store[self._slot]]
+
+    def _set_status(self, code: int) -> None:
+        old = self._store[self._slot]
+        self._store[self._slot] = code
+        if self._hotel is not None:
+            self._hotel._on_transition(self._slot, old, code)
 
     def check_in(self) -> bool:
         """Set room status from Available to Occupied, returns True if success."""
-        if self._status != ROOM_STATUSES[0]:
+        if self._store[self._slot] != AVAILABLE:
             raise CheckInException()
-        self._status = ROOM_STATUSES[1]
+        self._set_status(OCCUPIED)
         return True
 
     def check_out(self) -> bool:
         """Set room status from Occupied to Vacant, returns True if success."""
-        if self._status != ROOM_STATUSES[1]:
+        if self._store[self._slot] != OCCUPIED:
             raise CheckOutException()
-        self._status = ROOM_STATUSES[2]
+        self._set_status(VACANT)
         return True
 
     def clean(self) -> bool:
         """Set room status from Vacant to Available, returns True if success."""
-        if self._status != ROOM_STATUSES[2]:
+        if self._store[self._slot] != VACANT:
             raise CleanException()
-        self._status = ROOM_STATUSES[0]
+        self._set_status(AVAILABLE)
         return True
 
     def repair(self) -> bool:
         """Set room status from Vacant to Repair, returns True if success."""
-        if self._status != ROOM_STATUSES[2]:
+        if self._store[self._slot] != VACANT:
             raise RepairException()
-        self._status = ROOM_STATUSES[3]
+        self._set_status(REPAIR)
         return True
 
     def repaired(self) -> bool:
         """Set room status from Repair to Vacant, returns True if success."""
-        if self._status != ROOM_STATUSES[3]:
+        if self._store[self._slot] != REPAIR:
             raise RepairedException()
-        self._status = ROOM_STATUSES[2]
+        self._set_status(VACANT)
         return True
 
 
+def room_number(slot: int) -> str:
+    """Room number of a Hotel slot, slot is floor major and column A-E."""
+    floor, col = divmod(slot, ROOMS_PER_FLOOR)
+    return f"{floor + 1}{HOTEL_COLUMNS[col]}"
+
+
 class Hotel:
     """
     Hotel class that represents the hotel system. There must be always 5 rooms for each floor.
@@ -89,62 +156,143 @@ class Hotel:
     Parameters:
         m_floors <int>: number of floor
 
-        rooms_w_status <List[List[str]]>: floor matrix with each room set with user defined status (optional, default to all Available)
+        rooms_w_status <List[List[str]] | bytes>: floor matrix with each room set with user defined status, or flat buffer of 5 status codes per floor (optional, default to all Available)
+
+        compact <bool>: only keep the status code buffer and create Room views on demand (optional, default to False)
 
-    Acceptable statuses are "Available", "Occupied", "Vacant", "Repair".
+        lazy <bool>: start all Available in O(1), only rooms and floors that leave the default are stored, implies compact (optional, default to False)
+
+    Acceptable statuses are "Available", "Occupied", "Vacant", "Repair", their status
+    codes in a flat buffer are 0, 1, 2, 3.
     """
 
+    _room_type = Room
+
     def __init__(
-        self, m_floors: int, rooms_w_status: Union[List[List[str]], None] = None
+        self,
+        m_floors: int,
+        rooms_w_status: Union[List[List[str]], GridBuffer, None] = None,
+        compact: bool = False,
+        lazy: bool = False,
     ) -> None:
         if not isinstance(m_floors, int) or m_floors < 1:
             raise FloorCountException()
         self.floor_count = m_floors
-        self._rooms = []
-        if rooms_w_status is not None:
-            if m_floors != len(rooms_w_status):
-                raise FloorCountException(custom=True)
-            for i in range(len(rooms_w_status)):
-                if len(rooms_w_status[i]) != len(HOTEL_COLUMNS):
-                    raise RoomCountException(i + 1, len(rooms_w_status[i]))
-                self._rooms.append(
-                    [
-                        Room(f"{i+1}{HOTEL_COLUMNS[j]}", status=v)
-                        for j, v in enumerate(rooms_w_status[i])
-                    ]
+        # longest floor number without leading zeros
+        self._floor_digits = len(str(m_floors))
+        statuses: StatusStore
+        if lazy:
+            if rooms_w_status is not None:
+                raise ValueError(
+                    "a lazy hotel starts all Available, got rooms_w_status"
                 )
+            statuses = ImplicitArray(lambda slot: AVAILABLE)
+        elif is_grid_buffer(rooms_w_status):
+            if len(rooms_w_status) != m_floors * ROOMS_PER_FLOOR:
+                raise FloorCountException(custom=True)
+            statuses = bytearray(rooms_w_status)
+            invalid = statuses.translate(None, STATUS_CODES)
+            if invalid:
+                raise RoomStatusException(status=invalid[0])
+        elif rooms_w_status is not None:
+            floors = cast(List[List[str]], rooms_w_status)
+            if m_floors != len(floors):
+                raise FloorCountException(custom=True)
+            statuses = bytearray()
+            for i in range(len(floors)):
+                if len(floors[i]) != len(HOTEL_COLUMNS):
+                    raise RoomCountException(i + 1, len(floors[i]))
+                for v in floors[i]:
+                    if v not in ROOM_STATUSES:
+                        raise RoomStatusException(status=v)
+                    statuses.append(ROOM_STATUS_CODE[v])
         else:
-            for i in range(m_floors):
-                self._rooms.append([Room(f"{i+1}{j}") for j in HOTEL_COLUMNS])
+            statuses = bytearray(m_floors * ROOMS_PER_FLOOR)
+        self._statuses = statuses
+        # TransitionLog recording every status change, set by HotelStore
+        self._log: Optional[TransitionLog] = None
+        self._rooms: Optional[List[List[Room]]] = None
+        if isinstance(statuses, ImplicitArray):
+            # untouched floors only exist implicitly in the index and the counters
+            self._index = AvailabilityIndex.implicit(m_floors)
+            self._counts = StatusCounts.implicit(m_floors)
+            return
+        if not compact:
+            self._rooms = [
+                [
+                    self._room_type._view(statuses, i + j, self)
+                    for j in range(ROOMS_PER_FLOOR)
+                ]
+                for i in range(0, len(statuses), ROOMS_PER_FLOOR)
+            ]
+        self._index_rooms(statuses)
+
+    def _index_rooms(self, statuses: bytearray) -> None:
+        """Build the Available room index and the status counters over the status code buffer."""
+        self._index = AvailabilityIndex(self.floor_count, statuses)
+        self._counts = StatusCounts(self.floor_count, statuses)
+
+    def _status_buffer(self) -> bytearray:
+        """Dense status code buffer, 5 codes per floor."""
+        if isinstance(self._statuses, ImplicitArray):
+            return self._statuses.to_bytearray(self.floor_count * ROOMS_PER_FLOOR)
+        return self._statuses
+
+    def _room_at(self, slot: int) -> Room:
+        if self._rooms is None:
+            return self._room_type._view(self._statuses, slot, self)
+        return self._rooms[slot // ROOMS_PER_FLOOR][slot % ROOMS_PER_FLOOR]
+
+    def _on_transition(self, slot: int, old: int, new: int) -> None:
+        """Called by Room after its status code changed from old to new."""
+        if old == AVAILABLE:
+            self._index.discard(slot)
+        if new == AVAILABLE:
+            self._index.add(slot)
+        self._counts.move(slot, old, new)
+        if self._log is not None:
+            self._log.record(slot, new)
 
     def assign_room(self) -> Union[str, None]:
         """Assign Available room nearest to the hotel entrance. Will return room number or None if no Available room."""
-        for i in range(self.floor_count):
-            if i % 2:
-                for j in reversed(self._rooms[i]):
-                    if j.status == ROOM_STATUSES[0]:
-                        j.check_in()
-                        return j.number
-            else:
-                for j in self._rooms[i]:
-                    if j.status == ROOM_STATUSES[0]:
-                        j.check_in()
-                        return j.number
-        return None
+        slot = self._index.first()
+        if slot is None:
+            return None
+        self._statuses[slot] = OCCUPIED
+        self._on_transition(slot, AVAILABLE, OCCUPIED)
+        return room_number(slot)
 
-    def list_available_rooms(self) -> List:
-        """Will return a list of Available room number in order from closest to furthest room from the hotel entrance."""
-        avail_rooms = []
-        for i in range(self.floor_count):
-            if i % 2:
-                for j in reversed(self._rooms[i]):
-                    if j.status == ROOM_STATUSES[0]:
-                        avail_rooms.append(j.number)
-            else:
-                for j in self._rooms[i]:
-                    if j.status == ROOM_STATUSES[0]:
-                        avail_rooms.append(j.number)
-        return avail_rooms
+    def list_available_rooms(
+        self, limit: Optional[int] = None, offset: int = 0
+    ) -> List[str]:
+        """Will return a list of Available room number in order from closest to furthest room from the hotel entrance.
+
+        Parameters:
+            limit <int>: maximum number of room to return (optional, default to all)
+
+            offset <int>: number of nearest Available room to skip (optional, default to 0)
+        """
+        return list(islice(self.iter_available_rooms(offset), limit))
+
+    def iter_available_rooms(self, offset: int = 0) -> Iterator[str]:
+        """Lazily yield Available room number from closest to furthest room from the hotel entrance."""
+        for slot in self._index.iter_slots(offset):
+            yield room_number(slot)
+
+    def stats(self, floor: Optional[int] = None) -> Dict[str, int]:
+        """Number of rooms in each status, for the whole hotel or one floor, in O(1).
+
+        Parameters:
+            floor <int>: floor number (1-M) (optional, default to the whole hotel)
+        """
+        if floor is None:
+            return dict(zip(ROOM_STATUSES, self._counts.totals))
+        return dict(zip(ROOM_STATUSES, self._counts.floor(self._floor_index(floor))))
+
+    def _floor_index(self, floor: int) -> int:
+        if not isinstance(floor, int) or not 1 <= floor <= self.floor_count:
+            raise IndexError(f"floor must be 1-{self.floor_count}, received {floor}")
+        return floor - 1
 
     def get_room(self, num: str) -> Union[Room, None]:
         """Retrieve Room object given the room number.
@@ -152,76 +300,260 @@ class Hotel:
         Parameters:
             num <int> : room number, format is {i}{j} where i is floor number (1-M) and j is room column (A-E).
         """
-        result = re.search(r"^(\d+)([ABCDE]+)$", num)
-        if not result:
+        slot = self._find_slot(num)
+        if slot is None:
+            return None
+        return self._room_at(slot)
+
+    def get_rooms(self, nums: Iterable[str]) -> List[Union[Room, None]]:
+        """Retrieve Room objects given a sequence of room number, invalid number will be None."""
+        return [self.get_room(num) for num in nums]
+
+    def _find_slot(self, num: str) -> Optional[int]:
+        """Slot of room number in the status buffer, logs the error and returns None if invalid."""
+        # the former ^...$ regex accepted one trailing newline, keep accepting it
+        if num.endswith("\n"):
+            num = num[:-1]
+        # fast path for well formed room number, no regex involved
+        col_index = COLUMN_INDEX.get(num[-1:])
+        digits = num[:-1]
+        if (
+            col_index is not None
+            and len(digits) <= self._floor_digits
+            and digits.isdecimal()
+        ):
+            row = int(digits)
+            if 0 < row <= self.floor_count:
+                return (row - 1) * ROOMS_PER_FLOOR + col_index
+        parsed = _parse_room_number(num)
+        if parsed is None:
             logging.error(
                 f"Invalid num value {num}. Format is (i)(j) where i is floor number (1-{self.floor_count}) and j is room column (A-E)."
             )
             return None
-        # group(0) will be the whole match as it is a group itself
-        row = int(result.group(1))
-        col = result.group(2)
-        if row < 1 or row > len(self._rooms):
-            logging.error(f"floor must be 1-{len(self._rooms)}, received {row}.")
+        digits, col = parsed
+        row = self._floor_number(digits)
+        if row < 1 or row > self.floor_count:
+            logging.error(
+                f"floor must be 1-{self.floor_count}, received {digits[:20]}"
+                f"{'...' if len(digits) > 20 else ''}."
+            )
             return None
-        if col not in HOTEL_COLUMNS:
+        if col not in COLUMN_INDEX:
             logging.error(f"room column must be in {HOTEL_COLUMNS}, received {col}.")
             return None
-        return self._rooms[row - 1][HOTEL_COLUMNS.index(col)]
+        return (row - 1) * ROOMS_PER_FLOOR + COLUMN_INDEX[col]
+
+    def _floor_number(self, digits: str) -> int:
+        """Floor of a decimal string, 0 when it has more significant digits than the floor count so int() never sees a huge number."""
+        digits = digits.lstrip("0")
+        if len(digits) > self._floor_digits:
+            return 0
+        return int(digits or "0")
+
+    def assign_rooms(self, k: int) -> List[str]:
+        """Assign up to k Available rooms nearest to the hotel entrance. Will return the assigned room numbers in order."""
+        slots = list(islice(self._index.iter_slots(), max(k, 0)))
+        statuses = self._statuses
+        for slot in slots:
+            statuses[slot] = OCCUPIED
+            self._on_transition(slot, AVAILABLE, OCCUPIED)
+        return [room_number(slot) for slot in slots]
+
+    def assign_block(self, k: int) -> List[str]:
+        """Assign the nearest to the hotel entrance run of k adjacent Available rooms on one floor, in the floor direction. Will return the room numbers in order or an empty list if no floor has such a run."""
+        first = self._index.first_run(k)
+        if first is None:
+            return []
+        return self._claim_run(first, k)
+
+    def _claim_run(self, first: int, k: int) -> List[str]:
+        """Mark the k rooms from slot first in entrance order as Occupied, returns their numbers."""
+        floor = first // ROOMS_PER_FLOOR
+        start = entrance_position(first)
+        slots = [slot_of(floor, position) for position in range(start, start + k)]
+        for slot in slots:
+            self._statuses[slot] = OCCUPIED
+            self._on_transition(slot, AVAILABLE, OCCUPIED)
+        return [room_number(slot) for slot in slots]
+
+    def check_in_many(self, nums: Iterable[str]) -> List[bool]:
+        """Check in every room in nums, returns per room result instead of raising CheckInException."""
+        return self._transition_many(nums, AVAILABLE, OCCUPIED)
+
+    def check_out_many(self, nums: Iterable[str]) -> List[bool]:
+        """Check out every room in nums, returns per room result instead of raising CheckOutException."""
+        return self._transition_many(nums, OCCUPIED, VACANT)
+
+    def clean_many(self, nums: Iterable[str]) -> List[bool]:
+        """Clean every room in nums, returns per room result instead of raising CleanException."""
+        return self._transition_many(nums, VACANT, AVAILABLE)
+
+    def repair_many(self, nums: Iterable[str]) -> List[bool]:
+        """Repair every room in nums, returns per room result instead of raising RepairException."""
+        return self._transition_many(nums, VACANT, REPAIR)
+
+    def repaired_many(self, nums: Iterable[str]) -> List[bool]:
+        """Finish repairing every room in nums, returns per room result instead of raising RepairedException."""
+        return self._transition_many(nums, REPAIR, VACANT)
+
+    def _transition_many(self, nums: Iterable[str], old: int, new: int) -> List[bool]:
+        """Move each room from status code old to new in one pass, invalid room or status gives False."""
+        statuses = self._statuses
+        results = []
+        for num in nums:
+            slot = self._find_slot(num)
+            if slot is None or statuses[slot] != old:
+                results.append(False)
+                continue
+            statuses[slot] = new
+            self._on_transition(slot, old, new)
+            results.append(True)
+        return results
+
+
+def _parse_room_number(num: str) -> Optional[Tuple[str, str]]:
+    """Split room number into floor digits and column letters, None if format is invalid."""
+    split = len(num)
+    while split and num[split - 1] in COLUMN_INDEX:
+        split -= 1
+    digits = num[:split]
+    if split == len(num) or not digits.isdecimal():
+        return None
+    return digits, num[split:]
+
 
+class _SimulationQueries(ABC):
+    """Time bounded queries over the simulate generator, each stops as soon as it has the answer."""
 
-class VirusMap:
-    def __init__(self, m: int, n: int, matrix: List[List[int]]) -> None:
+    @abstractmethod
+    def simulate(self) -> Iterator[Tuple[int, List[Tuple[int, int]]]]:
+        """Lazily yield (unit_time, rooms infected on that unit_time), every call starts from the initial map."""
+
+    def infected_by(self, unit_time: int) -> int:
+        """Number of infected guests once unit_time is over, including the initially infected."""
+        infected = 0
+        for day, rooms in self.simulate():
+            if day > unit_time:
+                break
+            infected += len(rooms)
+            if day == unit_time:
+                break
+        return infected
+
+    def first_infection_day(self, row: int, col: int) -> int:
+        """Unit_time the room gets infected, -1 if it never does."""
+        for day, rooms in self.simulate():
+            if (row, col) in rooms:
+                return day
+        return -1
+
+
+class _ReachabilityQueries(ABC):
+    """Connected component queries over the initial map, answered without simulating."""
+
+    @abstractmethod
+    def _room_rows(self) -> List[bytes]:
+        """Copy of the initial map as one bytes object per row."""
+
+    def is_fully_reachable(self) -> bool:
+        """
+        True if the infection can reach every healthy guest, without simulating.
+
+        The virus only spreads between neighbouring occupied rooms, so a healthy guest is
+        reachable if its connected group of occupied rooms holds an infected guest. The
+        groups are found with union-find over the runs of occupied rooms, O(M x N).
+        """
+        return components.is_fully_reachable(self._room_rows())
+
+    def component_labels(self) -> List[List[int]]:
+        """Connected group of every room, 0 for empty rooms and 1, 2, ... in scan order for occupied rooms."""
+        return components.component_labels(self._room_rows())
+
+    def _unreachable(self) -> bool:
+        """Precheck of solve, True if a healthy guest can never be infected and the precheck is cheap."""
+        rows = self._room_rows()
+        return components.precheck_pays_off(rows) and not (
+            components.is_fully_reachable(rows)
+        )
+
+
+class VirusMap(_SimulationQueries, _ReachabilityQueries):
+    def __init__(
+        self, m: int, n: int, matrix: Union[List[List[int]], GridBuffer]
+    ) -> None:
         self.m = m
         self.n = n
-        self.matrix = matrix
+        rows: Sequence[MutableSequence[int]]
+        if is_grid_buffer(matrix):
+            rows = grid_rows(m, n, matrix)
+        else:
+            rows = cast(List[List[int]], matrix)
+        self.matrix = rows
         self.unit_time = 0
-        self.healthy_guests: List[Tuple[int, int]] = []
-        self.rooms_to_infect: List[Tuple[int, int]] = []
 
     def solve(self) -> str:
+        if self._unreachable():
+            return "-1"
+        healthy_left = sum(row.count(1) for row in self.matrix)
+        for unit_time, infected_today in self.simulate():
+            if unit_time:
+                healthy_left -= len(infected_today)
+        self.unit_time = unit_time
+        if healthy_left:
+            return "-1"
+        return f"{self.unit_time}"
+
+    def simulate(self) -> Iterator[Tuple[int, List[Tuple[int, int]]]]:
+        """Lazily yield (unit_time, rooms infected on that unit_time), starting with the infected rooms at unit_time 0.
+
+        The simulation runs on its own copy of the rows, self.matrix is left untouched so
+        every query starts from the same map.
+        """
+        grid = [bytearray(row) for row in self.matrix]
+        infected_today = [
+            (row, col)
+            for row in range(self.m)
+            for col in range(self.n)
+            if grid[row][col] == 2
+        ]
+        unit_time = 0
+        yield unit_time, infected_today
+        probe = instrumentation.active
         while True:
-            visited_matrix = [[False] * self.n for _ in range(self.m)]
-            logging.debug(self.matrix)
-            # input("pause")
-            for row in range(self.m):
-                for col in range(self.n):
-                    self._visit_room(row, col, visited_matrix)
-            logging.debug(self.rooms_to_infect)
-            logging.debug(self.healthy_guests)
-            if not self.rooms_to_infect:
-                if not self.healthy_guests:
-                    return f"{self.unit_time}"
-                else:
-                    return "-1"
-            else:
-                for room in self.rooms_to_infect:
-                    self.matrix[room[0]][room[1]] = 2
-                    self.healthy_guests.remove((room[0], room[1]))
-                self.rooms_to_infect[:] = []
-                self.unit_time += 1
-            logging.debug("updating rooms_to_infect and healthy_guests list:")
-            logging.debug(self.rooms_to_infect)
-            logging.debug(self.healthy_guests)
-
-    def _visit_room(self, row, col, v_m, to_be_infected=False):
-        if to_be_infected and self.matrix[row][col] == 1:
-            if (row, col) not in self.rooms_to_infect:
-                self.rooms_to_infect.append((row, col))
-        if v_m[row][col]:
-            return
-        v_m[row][col] = True
-        if self.matrix[row][col] == 0:
-            return
-        if self.matrix[row][col] == 1:
-            if (row, col) not in self.healthy_guests:
-                self.healthy_guests.append((row, col))
-        if self.matrix[row][col] == 2:
-            neighbours = self._get_neighbours(row, col)
-            for neighbour in neighbours:
-                self._visit_room(neighbour[0], neighbour[1], v_m, True)
-
-    def _get_neighbours(self, row, col):
+            if probe is not None:
+                start = time.perf_counter()
+            rooms_to_infect: List[Tuple[int, int]] = []
+            for row, col in infected_today:
+                self._visit_room(grid, row, col, rooms_to_infect)
+            if probe is not None:
+                probe.append("VirusMap.day_seconds", time.perf_counter() - start)
+                probe.append("VirusMap.frontier_size", len(infected_today))
+                probe.count("VirusMap.cells_visited", len(infected_today))
+            if not rooms_to_infect:
+                return
+            infected_today = rooms_to_infect
+            unit_time += 1
+            yield unit_time, infected_today
+
+    def _visit_room(
+        self,
+        grid: List[bytearray],
+        row: int,
+        col: int,
+        rooms_to_infect: List[Tuple[int, int]],
+    ) -> None:
+        """Infect the healthy neighbours of a room infected on the previous unit_time."""
+        for n_row, n_col in self._get_neighbours(row, col):
+            if grid[n_row][n_col] == 1:
+                # marking now keeps a room from being queued twice in the same unit_time
+                grid[n_row][n_col] = 2
+                rooms_to_infect.append((n_row, n_col))
+
+    def _room_rows(self) -> List[bytes]:
+        return [bytes(row) for row in self.matrix]
+
+    def _get_neighbours(self, row: int, col: int) -> List[Tuple[int, int]]:
         neighbours = []
         if row != 0:
             neighbours.append((row - 1, col))
@@ -234,74 +566,144 @@ class VirusMap:
         return neighbours
 
 
-class VirusMapBfs:
-    def __init__(self, m: int, n: int, matrix: List[List[int]]) -> None:
+class VirusMapBfs(_SimulationQueries, _ReachabilityQueries):
+    def __init__(
+        self, m: int, n: int, matrix: Union[List[List[int]], GridBuffer]
+    ) -> None:
         self.m = m
         self.n = n
         self.matrix = matrix
         self.unit_time = 0
-        self.healthy_guests: set[Tuple[int, int]] = set()
-        self.infection_list_today: List[Tuple[int, int]] = []
-        self.infection_list_tmr: List[Tuple[int, int]] = []
 
     def solve(self) -> str:
         """
         pseudo code:
-        - find all the infected person, add them to infection_today
-        - find all the healthy_guests, add them to healthy_guests set
-        - if infection_today empty, if healthy_guests empty return 0 else return 1
-        - loop infected room:
-            - if the neighbour is healthy, add to visited list, add to infection_tmr
-        - loop infection_tmr, change their status to 2/ infected and remove the room from healthy_guests
-        - if infection_tmr not empty, unit_time+1, infection_today= infection_tmr, infection_tmr=[]
-        - else if healthy_guests not empty, return -1, else: return unit_time
+        - copy the map into a flat grid with a border of empty rooms, so neighbours need no bound check
+        - add all the infected rooms to the frontier deque with infection time 0, count the healthy guests
+        - pop room from the frontier:
+            - if the neighbour is healthy, mark it infected in place, set its infection time to room time + 1, push it to the frontier
+        - if healthy guests remain return -1, else return the last infection time
+        Every room is pushed at most once so the runtime is O(M x N). Maps where some
+        group of healthy guests holds no infected guest answer -1 before the BFS, see
+        is_fully_reachable.
         """
-
-        def _get_neighbours(coord: Tuple[int, int]) -> List[Tuple[int, int]]:
-            row = coord[0]
-            col = coord[1]
-            neighbours: List[Tuple[int, int]] = []
-            if row != 0:
-                neighbours.append((row - 1, col))
-            if row != self.m - 1:
-                neighbours.append((row + 1, col))
-            if col != 0:
-                neighbours.append((row, col - 1))
-            if col != self.n - 1:
-                neighbours.append((row, col + 1))
-            return neighbours
-
+        if self._unreachable():
+            return "-1"
+        _, healthy_left = self._spread()
+        if healthy_left:
+            return "-1"
+        return str(self.unit_time)
+
+    def infection_times(self) -> List[List[int]]:
+        """Return the unit_time each room got infected, 0 for initially infected and -1 if never infected."""
+        times, _ = self._spread()
+        width = self.n + 2
+        return [
+            times[(row + 1) * width + 1 : (row + 1) * width + 1 + self.n].tolist()
+            for row in range(self.m)
+        ]
+
+    def simulate(self) -> Iterator[Tuple[int, List[Tuple[int, int]]]]:
+        """Lazily yield (unit_time, rooms infected on that unit_time), starting with the infected rooms at unit_time 0.
+
+        Each unit_time is only computed when the generator is advanced, self.matrix is left untouched.
+        """
+        width = self.n + 2
+        grid = self._padded_grid()
+        frontier = []
+        index = grid.find(2)
+        while index != -1:
+            frontier.append(index)
+            index = grid.find(2, index + 1)
+        unit_time = 0
+        probe = instrumentation.active
+        while frontier:
+            yield unit_time, [
+                (room // width - 1, room % width - 1) for room in frontier
+            ]
+            unit_time += 1
+            if probe is not None:
+                start = time.perf_counter()
+            infected = []
+            for room in frontier:
+                for neighbour in (room - width, room + width, room - 1, room + 1):
+                    if grid[neighbour] == 1:
+                        grid[neighbour] = 2
+                        infected.append(neighbour)
+            if probe is not None:
+                probe.append("VirusMapBfs.day_seconds", time.perf_counter() - start)
+                probe.append("VirusMapBfs.frontier_size", len(frontier))
+                probe.count("VirusMapBfs.cells_visited", len(frontier))
+            frontier = infected
+
+    def _room_rows(self) -> List[bytes]:
+        matrix = self.matrix
+        if is_grid_buffer(matrix):
+            n = self.n
+            return [bytes(matrix[row * n : (row + 1) * n]) for row in range(self.m)]
+        return [bytes(row) for row in matrix]
+
+    def _padded_grid(self) -> bytearray:
+        """Copy the map into a flat grid of width N + 2 with a border of empty rooms."""
+        width = self.n + 2
+        grid = bytearray(width * (self.m + 2))
+        matrix = self.matrix
         for row in range(self.m):
-            for col in range(self.n):
-                if self.matrix[row][col] == 1:
-                    self.healthy_guests.add((row, col))
-                if self.matrix[row][col] == 2:
-                    self.infection_list_today.append((row, col))
-
-        if not self.infection_list_today:
-            if not self.healthy_guests:
-                return "0"
-            else:
-                return "-1"
-
-        while True:
-            visited_1: List[Tuple[int, int]] = []
-            for room_coord in self.infection_list_today:
-                neighbours = _get_neighbours(room_coord)
-                for n in neighbours:
-                    if self.matrix[n[0]][n[1]] == 1:
-                        if n not in visited_1:
-                            visited_1.append(n)
-                            self.infection_list_tmr.append(n)
-            for coord in self.infection_list_tmr:
-                self.matrix[coord[0]][coord[1]] = 2
-                self.healthy_guests.remove(coord)
-            if self.infection_list_tmr:
-                self.unit_time += 1
-                self.infection_list_today = self.infection_list_tmr
-                self.infection_list_tmr = []
+            start = (row + 1) * width + 1
+            if is_grid_buffer(matrix):
+                grid[start : start + self.n] = matrix[row * self.n : (row + 1) * self.n]
             else:
-                if len(self.healthy_guests):
-                    return "-1"
-                else:
-                    return str(self.unit_time)
+                grid[start : start + self.n] = bytes(matrix[row])
+        return grid
+
+    def _spread(self) -> Tuple[array, int]:
+        """Run the multi-source BFS, returns padded infection times and count of healthy guests left."""
+        width = self.n + 2
+        grid = self._padded_grid()
+        times = array("i", [-1]) * len(grid)
+        frontier: Deque[int] = deque()
+        index = grid.find(2)
+        while index != -1:
+            times[index] = 0
+            frontier.append(index)
+            index = grid.find(2, index + 1)
+        healthy_left = grid.count(1)
+        self.unit_time = 0
+        while frontier and healthy_left:
+            room = frontier.popleft()
+            unit_time = times[room] + 1
+            for neighbour in (room - width, room + width, room - 1, room + 1):
+                if grid[neighbour] == 1:
+                    grid[neighbour] = 2
+                    times[neighbour] = unit_time
+                    healthy_left -= 1
+                    frontier.append(neighbour)
+                    # BFS pops rooms in time order so the last infection is the latest
+                    self.unit_time = unit_time
+        probe = instrumentation.active
+        if probe is not None:
+            # the deque mixes unit_times, so the per unit_time frontier is rebuilt from times
+            frontier_sizes = Counter(times)
+            frontier_sizes.pop(-1, None)
+            for day in range(self.unit_time + 1):
+                probe.append("VirusMapBfs.frontier_size", frontier_sizes[day])
+            pushed = sum(frontier_sizes.values())
+            probe.count("VirusMapBfs.cells_visited", pushed - len(frontier))
+        return times, healthy_left
+
+
+instrumentation.register_timed(
+    Hotel,
+    "assign_room",
+    "assign_rooms",
+    "assign_block",
+    "list_available_rooms",
+    "get_room",
+    "get_rooms",
+    "stats",
+    "check_in_many",
+    "check_out_many",
+    "clean_many",
+    "repair_many",
+    "repaired_many",
+)
@@ -0,0 +1,233 @@
+"""
+Hotel persistence module.
+
+A HotelStore directory holds a binary snapshot of the Hotel status codes and an
+append-only log of the transitions made since that snapshot. Restoring memory maps
+the snapshot, replays the log tail into the status buffer and builds the Hotel from
+the status codes directly, no room status string is parsed.
+"""
+import mmap
+import os
+import struct
+import threading
+from typing import Any, Optional, Tuple, Type, Union
+
+from main.allocator import ROOMS_PER_FLOOR
+from main.exceptions import SnapshotException
+from main.global_vars import STATUS_CODES
+from main.main import Hotel
+
+# snapshot layout: magic, uint64 generation, uint64 floor count, then 5 status codes per floor
+SNAPSHOT_MAGIC = b"HSNP"
+SNAPSHOT_HEADER = struct.Struct("<4sQQ")
+# log layout: magic, uint64 generation of the snapshot it follows, then one record per transition
+LOG_MAGIC = b"HLOG"
+LOG_HEADER = struct.Struct("<4sQ")
+# record: uint32 slot, uint8 new status code
+LOG_RECORD = struct.Struct("<IB")
+SNAPSHOT_FILE = "hotel.snapshot"
+LOG_FILE = "hotel.log"
+
+
+class TransitionLog:
+    """
+    Append-only file of (slot, new status code) records.
+
+    Records are buffered by the file object, flush() makes them durable.
+
+    Parameters:
+        path <str>: log file path, created with a header when missing
+
+        generation <int>: generation of the snapshot the log follows
+
+        fsync <bool>: fsync the file on every flush (optional, default to False)
+    """
+
+    def __init__(
+        self, path: Union[str, os.PathLike], generation: int, fsync: bool = False
+    ) -> None:
+        self.path = path
+        self.generation = generation
+        self.fsync = fsync
+        # transitions of a ConcurrentHotel come from several threads
+        self.lock = threading.Lock()
+        if not os.path.exists(path):
+            _write_atomic(path, LOG_HEADER.pack(LOG_MAGIC, generation))
+        self._file = open(path, "ab")
+
+    def record(self, slot: int, code: int) -> None:
+        with self.lock:
+            self._file.write(LOG_RECORD.pack(slot, code))
+
+    def flush(self) -> None:
+        with self.lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        with self.lock:
+            self._flush()
+            self._file.close()
+
+
+class HotelStore:
+    """
+    Durable Hotel state kept in a directory as a snapshot plus a transition log.
+
+    Parameters:
+        directory <str>: directory of the snapshot and log files, created if missing
+
+        fsync <bool>: fsync the log on every flush and every snapshot (optional, default to False)
+    """
+
+    def __init__(self, directory: Union[str, os.PathLike], fsync: bool = False) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.log_path = os.path.join(directory, LOG_FILE)
+        self.fsync = fsync
+        self.hotel: Optional[Hotel] = None
+        self._log: Optional[TransitionLog] = None
+
+    def open(
+        self,
+        m_floors: Optional[int] = None,
+        hotel_type: Type[Hotel] = Hotel,
+        **kwargs: Any,
+    ) -> Hotel:
+        """
+        Restore the Hotel of the latest snapshot and log, or create one of m_floors floors.
+
+        Every later transition of the returned Hotel is appended to the log.
+
+        Parameters:
+            m_floors <int>: number of floor when there is no snapshot yet, ignored otherwise
+
+            hotel_type <type>: Hotel or a subclass such as ConcurrentHotel (optional, default to Hotel)
+
+            kwargs: extra arguments of hotel_type, e.g. compact=True
+        """
+        if os.path.exists(self.snapshot_path):
+            generation, floors, statuses = self._restore()
+        elif m_floors is None:
+            raise SnapshotException(
+                f"no snapshot in {self.snapshot_path}, m_floors is required"
+            )
+        else:
+            generation, floors = 1, m_floors
+            statuses = bytearray(m_floors * ROOMS_PER_FLOOR)
+            self._write_snapshot(generation, floors, statuses)
+            self._reset_log(generation)
+        hotel = hotel_type(floors, statuses, **kwargs)
+        self._log = TransitionLog(self.log_path, generation, self.fsync)
+        hotel._log = self._log
+        self.hotel = hotel
+        return hotel
+
+    def flush(self) -> None:
+        """Make every transition recorded so far durable."""
+        if self._log is not None:
+            self._log.flush()
+
+    def snapshot(self) -> None:
+        """
+        Write a snapshot of the current statuses and start an empty log after it.
+
+        Transitions wait while the snapshot is written. A crash between the snapshot
+        and the new log leaves a log of the previous generation, which is skipped.
+        """
+        hotel, log = self.hotel, self._log
+        if hotel is None or log is None:
+            raise SnapshotException("snapshot needs an opened hotel")
+        with log.lock:
+            log._flush()
+            generation = log.generation + 1
+            self._write_snapshot(generation, hotel.floor_count, hotel._status_buffer())
+            log._file.close()
+            self._reset_log(generation)
+            log.generation = generation
+            log._file = open(self.log_path, "ab")
+
+    def close(self) -> None:
+        """Flush and close the log, the Hotel stops being recorded."""
+        if self._log is not None:
+            self._log.close()
+        if self.hotel is not None:
+            self.hotel._log = None
+        self.hotel = self._log = None
+
+    def _restore(self) -> Tuple[int, int, bytearray]:
+        with open(self.snapshot_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if len(mapped) < SNAPSHOT_HEADER.size:
+                    raise SnapshotException("snapshot header is truncated")
+                magic, generation, floors = SNAPSHOT_HEADER.unpack_from(mapped)
+                if magic != SNAPSHOT_MAGIC:
+                    raise SnapshotException(
+                        f"snapshot must start with {SNAPSHOT_MAGIC!r}"
+                    )
+                statuses = bytearray(mapped[SNAPSHOT_HEADER.size :])
+        if floors < 1 or len(statuses) != floors * ROOMS_PER_FLOOR:
+            raise SnapshotException(
+                f"expected {floors * ROOMS_PER_FLOOR} rooms, got {len(statuses)}"
+            )
+        if self._replay(generation, statuses) is None:
+            # no log or a stale one, its transitions are already in the snapshot
+            self._reset_log(generation)
+        return generation, floors, statuses
+
+    def _replay(self, generation: int, statuses: bytearray) -> Optional[int]:
+        """Apply the log records of generation to statuses, returns the record count or None for a stale log."""
+        if not os.path.exists(self.log_path):
+            return None
+        with open(self.log_path, "rb") as f:
+            data = f.read()
+        if len(data) < LOG_HEADER.size:
+            return None
+        magic, log_generation = LOG_HEADER.unpack_from(data)
+        if magic != LOG_MAGIC:
+            raise SnapshotException(f"log must start with {LOG_MAGIC!r}")
+        if log_generation != generation:
+            return None
+        records = (len(data) - LOG_HEADER.size) // LOG_RECORD.size
+        end = LOG_HEADER.size + records * LOG_RECORD.size
+        rooms = len(statuses)
+        for slot, code in LOG_RECORD.iter_unpack(
+            memoryview(data)[LOG_HEADER.size : end]
+        ):
+            if slot >= rooms or code >= len(STATUS_CODES):
+                raise SnapshotException(f"log record ({slot}, {code}) is out of range")
+            statuses[slot] = code
+        if end != len(data):
+            # drop a record torn by a crash so appends stay aligned
+            with open(self.log_path, "r+b") as f:
+                f.truncate(end)
+        return records
+
+    def _write_snapshot(
+        self, generation: int, floors: int, statuses: bytearray
+    ) -> None:
+        _write_atomic(
+            self.snapshot_path,
+            SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, generation, floors) + statuses,
+            self.fsync,
+        )
+
+    def _reset_log(self, generation: int) -> None:
+        _write_atomic(self.log_path, LOG_HEADER.pack(LOG_MAGIC, generation), self.fsync)
+
+
+def _write_atomic(
+    path: Union[str, os.PathLike], data: bytes, fsync: bool = False
+) -> None:
+    """Write data to a temporary file then rename it over path."""
+    temporary = f"{os.fspath(path)}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(temporary, path)
@@ -0,0 +1,205 @@
+"""Room reservation module"""
+from bisect import bisect_left, insort
+from itertools import count, islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from main.allocator import ROOMS_PER_FLOOR, entrance_position, slot_of
+from main.exceptions import ReservationException
+from main.main import Hotel, room_number
+
+
+class Reservation(NamedTuple):
+    """
+    Booking of one room for the days [start, end).
+
+    Parameters:
+        start <int>: check-in day
+
+        end <int>: check-out day, the room is free again on that day
+
+        slot <int>: room slot in the Hotel status buffer
+
+        id <int>: reservation id
+    """
+
+    start: int
+    end: int
+    slot: int
+    id: int
+
+    @property
+    def number(self) -> str:
+        return room_number(self.slot)
+
+
+class ReservationBook:
+    """
+    Future bookings of the rooms of a Hotel.
+
+    Every room keeps its bookings sorted by day, bookings of a room never overlap so
+    one bisect tells if the room is free for [start, end). Each booked day also keeps
+    an int bitset of its booked rooms in entrance order, bit floor * 5 + position as
+    in Hotel.assign_room. OR-ing the bitsets of [start, end) gives every room booked
+    in the range at once, and the nearest free room is its lowest zero bit.
+
+    Only bookings are considered, the current status of a room is not.
+
+    Parameters:
+        hotel <Hotel>: hotel whose rooms are booked
+    """
+
+    def __init__(self, hotel: Hotel) -> None:
+        self.hotel = hotel
+        self.room_count = hotel.floor_count * ROOMS_PER_FLOOR
+        # slot -> its bookings sorted by start day
+        self._room_bookings: Dict[int, List[Reservation]] = {}
+        # day -> bitset of the rooms booked that day, bit is the entrance order
+        self._days: Dict[int, int] = {}
+        self._by_id: Dict[int, Reservation] = {}
+        self._ids = count(1)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def book(self, num: str, start: int, end: int) -> Reservation:
+        """Book room num for the days [start, end), raises ReservationException if the room is taken."""
+        _check_range(start, end)
+        slot = self._slot(num)
+        if not self._room_free(slot, start, end):
+            raise ReservationException(f"room {num} is booked during [{start}, {end})")
+        return self._add(slot, start, end)
+
+    def reserve(self, start: int, end: int) -> Optional[Reservation]:
+        """Book the room nearest to the entrance that is free for [start, end), None if every room is booked."""
+        _check_range(start, end)
+        slot = self._first_free_slot(self._busy(start, end))
+        if slot is None:
+            return None
+        return self._add(slot, start, end)
+
+    def cancel(self, reservation_id: int) -> Reservation:
+        """Remove a booking, returns it."""
+        reservation = self._by_id.pop(reservation_id, None)
+        if reservation is None:
+            raise ReservationException(f"no reservation with id {reservation_id}")
+        bookings = self._room_bookings[reservation.slot]
+        del bookings[bisect_left(bookings, reservation)]
+        self._toggle_days(reservation)
+        return reservation
+
+    def get(self, reservation_id: int) -> Optional[Reservation]:
+        return self._by_id.get(reservation_id)
+
+    def is_free(self, num: str, start: int, end: int) -> bool:
+        """True if room num has no booking overlapping [start, end), O(log bookings of the room)."""
+        _check_range(start, end)
+        return self._room_free(self._slot(num), start, end)
+
+    def nearest_free(self, start: int, end: int) -> Optional[str]:
+        """Room number nearest to the entrance that is free for [start, end), None if every room is booked."""
+        _check_range(start, end)
+        slot = self._first_free_slot(self._busy(start, end))
+        return None if slot is None else room_number(slot)
+
+    def free_rooms(
+        self, start: int, end: int, limit: Optional[int] = None
+    ) -> List[str]:
+        """Room numbers free for [start, end) from closest to furthest from the entrance."""
+        _check_range(start, end)
+        bits = _bit_string(self._busy(start, end))
+        return [room_number(slot) for slot in islice(self._free_slots(bits), limit)]
+
+    def free_many(self, nums: Iterable[str], start: int, end: int) -> List[bool]:
+        """Whether each room in nums is free for [start, end), the bookings are searched once for all rooms."""
+        _check_range(start, end)
+        bits = _bit_string(self._busy(start, end))
+        results = []
+        for num in nums:
+            order = _entrance_order(self._slot(num))
+            results.append(order >= len(bits) or bits[order] == "0")
+        return results
+
+    def bookings(self, start: int, end: int) -> List[Reservation]:
+        """Bookings overlapping [start, end) sorted by start day."""
+        _check_range(start, end)
+        bits = _bit_string(self._busy(start, end))
+        found = []
+        order = bits.find("1")
+        while order != -1:
+            bookings = self._room_bookings[slot_of(*divmod(order, ROOMS_PER_FLOOR))]
+            i = bisect_left(bookings, (end,))
+            while i and bookings[i - 1].end > start:
+                i -= 1
+                found.append(bookings[i])
+            order = bits.find("1", order + 1)
+        return sorted(found)
+
+    def _slot(self, num: str) -> int:
+        slot = self.hotel._find_slot(num)
+        if slot is None:
+            raise ReservationException(f"{num} is not a room of the hotel")
+        return slot
+
+    def _room_free(self, slot: int, start: int, end: int) -> bool:
+        bookings = self._room_bookings.get(slot)
+        if not bookings:
+            return True
+        # the last booking starting before end is the only one that can overlap
+        i = bisect_left(bookings, (end,))
+        return i == 0 or bookings[i - 1].end <= start
+
+    def _add(self, slot: int, start: int, end: int) -> Reservation:
+        reservation = Reservation(start, end, slot, next(self._ids))
+        insort(self._room_bookings.setdefault(slot, []), reservation)
+        self._by_id[reservation.id] = reservation
+        self._toggle_days(reservation)
+        return reservation
+
+    def _toggle_days(self, reservation: Reservation) -> None:
+        """Flip the room bit on every day of reservation, a room bit is only set by one booking."""
+        bit = 1 << _entrance_order(reservation.slot)
+        days = self._days
+        for day in range(reservation.start, reservation.end):
+            booked = days.get(day, 0) ^ bit
+            if booked:
+                days[day] = booked
+            else:
+                del days[day]
+
+    def _busy(self, start: int, end: int) -> int:
+        """Bitset of the rooms booked on any day of [start, end)."""
+        busy = 0
+        days = self._days
+        for day in range(start, end):
+            busy |= days.get(day, 0)
+        return busy
+
+    def _first_free_slot(self, busy: int) -> Optional[int]:
+        # busy + 1 carries through the trailing ones up to the lowest zero bit
+        order = ((busy + 1) & ~busy).bit_length() - 1
+        if order >= self.room_count:
+            return None
+        return slot_of(*divmod(order, ROOMS_PER_FLOOR))
+
+    def _free_slots(self, bits: str) -> Iterator[int]:
+        """Slots whose bit is 0 in entrance order, rooms past the end of bits are free."""
+        order = bits.find("0")
+        while order != -1:
+            yield slot_of(*divmod(order, ROOMS_PER_FLOOR))
+            order = bits.find("0", order + 1)
+        for order in range(len(bits), self.room_count):
+            yield slot_of(*divmod(order, ROOMS_PER_FLOOR))
+
+
+def _entrance_order(slot: int) -> int:
+    return slot // ROOMS_PER_FLOOR * ROOMS_PER_FLOOR + entrance_position(slot)
+
+
+def _bit_string(bitset: int) -> str:
+    """Bits of bitset lowest first, character i is bit i."""
+    return bin(bitset)[:1:-1] if bitset else ""
+
+
+def _check_range(start: int, end: int) -> None:
+    if not start < end:
+        raise ReservationException(f"check-in {start} must be before check-out {end}")
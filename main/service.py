@@ -0,0 +1,311 @@
+"""
+Asyncio front desk service module.
+
+Serves a Hotel over JSON lines, one request object per line:
+```{"id": 1, "op": "assign"}```, ```{"id": 2, "op": "get", "room": "1A"}```,
+```{"id": 3, "op": "list", "limit": 10, "offset": 0}``` or one of the transitions
+```{"id": 4, "op": "check_out", "room": "1A"}``` (check_in, check_out, clean, repair,
+repaired). Each response line is ```{"id": ..., "ok": true, "result": ...}``` or
+```{"id": ..., "ok": false, "error": "..."}```.
+
+Run with ```$python -m main.service --floors 100 --port 8765``` (or ```--unix PATH``` or
+```--stdio```), add ```--data DIR``` to persist the hotel across restarts.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from main import instrumentation
+from main.global_vars import HOTEL_COLUMNS
+from main.main import Hotel
+from main.persistence import HotelStore
+
+Request = Dict[str, Any]
+
+# batch Hotel method of each room status transition op
+TRANSITIONS = {
+    "check_in": "check_in_many",
+    "check_out": "check_out_many",
+    "clean": "clean_many",
+    "repair": "repair_many",
+    "repaired": "repaired_many",
+}
+OPS = ("assign", "list", "get", *TRANSITIONS)
+# characters after the floor digits of a room number
+_ROOM_SUFFIX = "".join(HOTEL_COLUMNS) + "\n"
+
+
+class FrontDesk:
+    """
+    Coalesces the requests of one event loop tick into batched Hotel operations.
+
+    Requests are queued as they arrive and the queue is flushed once per loop tick.
+    Each run of consecutive requests with the same op becomes one Hotel call
+    (assign_rooms, get_rooms, check_out_many, ...), so requests still take effect in
+    arrival order.
+
+    Parameters:
+        hotel <Hotel>: hotel to serve
+    """
+
+    def __init__(self, hotel: Hotel) -> None:
+        self.hotel = hotel
+        self.batches = 0
+        self._pending: List[Tuple[Request, "asyncio.Future[Dict[str, Any]]"]] = []
+
+    def submit(self, request: Request) -> "asyncio.Future[Dict[str, Any]]":
+        """Queue request, returns a future of its response."""
+        error = _validate(request, self.hotel.floor_count)
+        if error is not None:
+            return _rejected(request.get("id"), error)
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[Dict[str, Any]]" = loop.create_future()
+        if not self._pending:
+            loop.call_soon(self._flush)
+        self._pending.append((request, future))
+        return future
+
+    def submit_line(self, line: bytes) -> "asyncio.Future[Dict[str, Any]]":
+        """Queue a JSON encoded request, a malformed line gets an error response."""
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return _rejected(None, f"invalid JSON: {e}")
+        if not isinstance(request, dict):
+            return _rejected(None, "request must be a JSON object")
+        return self.submit(request)
+
+    def _flush(self) -> None:
+        pending, self._pending = self._pending, []
+        if instrumentation.active is not None:
+            instrumentation.active.append("FrontDesk.batch_size", len(pending))
+        start = 0
+        while start < len(pending):
+            op = pending[start][0]["op"]
+            end = start + 1
+            while end < len(pending) and pending[end][0]["op"] == op:
+                end += 1
+            run = pending[start:end]
+            self.batches += 1
+            try:
+                results = self._run(op, [request for request, _ in run])
+            except Exception as e:
+                # last resort, _validate rejects bad input per request before it gets here;
+                # fail this run only, later runs of the tick still get their answers
+                for request, future in run:
+                    if not future.cancelled():
+                        future.set_result(
+                            {"id": request.get("id"), "ok": False, "error": str(e)}
+                        )
+            else:
+                for (request, future), result in zip(run, results):
+                    if not future.cancelled():
+                        future.set_result(
+                            {"id": request.get("id"), "ok": True, "result": result}
+                        )
+            start = end
+
+    def _run(self, op: str, requests: List[Request]) -> List[Any]:
+        """Apply a run of requests with the same op as one Hotel call, returns each result."""
+        hotel = self.hotel
+        if op == "assign":
+            rooms: List[Optional[str]] = list(hotel.assign_rooms(len(requests)))
+            return rooms + [None] * (len(requests) - len(rooms))
+        if op == "list":
+            # every list request of the run sees the same hotel, share equal pages
+            pages: Dict[Tuple[Any, Any], List[str]] = {}
+            results = []
+            for request in requests:
+                key = (request.get("limit"), request.get("offset", 0))
+                if key not in pages:
+                    pages[key] = hotel.list_available_rooms(*key)
+                results.append(pages[key])
+            return results
+        nums = [request["room"] for request in requests]
+        if op == "get":
+            return [
+                None if room is None else {"number": room.number, "status": room.status}
+                for room in hotel.get_rooms(nums)
+            ]
+        return getattr(hotel, TRANSITIONS[op])(nums)
+
+
+def _rejected(request_id: Any, error: str) -> "asyncio.Future[Dict[str, Any]]":
+    """Already resolved future of an error response."""
+    future: "asyncio.Future[Dict[str, Any]]" = (
+        asyncio.get_running_loop().create_future()
+    )
+    future.set_result({"id": request_id, "ok": False, "error": error})
+    return future
+
+
+def _validate(request: Request, floor_count: int) -> Optional[str]:
+    """Error message of a malformed request, None if it is valid."""
+    op = request.get("op")
+    if op not in OPS:
+        return f"op must be in {list(OPS)}, received {op}"
+    if op in ("get", *TRANSITIONS):
+        room = request.get("room")
+        if not isinstance(room, str):
+            return f"{op} needs a room number string"
+        # an unknown room of a sane length is answered per room by the batch, not rejected
+        floor = room.rstrip(_ROOM_SUFFIX).lstrip("0")
+        if len(floor) > len(str(floor_count)):
+            return f"room floor must be 1-{floor_count}, received {len(floor)} digits"
+    if op == "list":
+        for key in ("limit", "offset"):
+            value = request.get(key)
+            if value is not None and (
+                not isinstance(value, int) or not 0 <= value <= sys.maxsize
+            ):
+                return f"{key} must be an integer in 0-{sys.maxsize}, received {value}"
+    return None
+
+
+def _encode(response: Dict[str, Any]) -> bytes:
+    return json.dumps(response, separators=(",", ":")).encode() + b"\n"
+
+
+async def serve_lines(
+    desk: FrontDesk,
+    reader: asyncio.StreamReader,
+    write: Callable[[bytes], Any],
+    drain: Optional[Callable[[], Awaitable[None]]] = None,
+) -> None:
+    """
+    Answer every request line of reader until EOF, responses keep the request order.
+
+    Lines already buffered are all submitted in the same loop tick so pipelined
+    requests coalesce, and the responses completed in one tick are sent with a
+    single write call.
+    """
+    loop = asyncio.get_running_loop()
+    outgoing: List[bytes] = []
+    waiting: Deque["asyncio.Future[Dict[str, Any]]"] = deque()
+
+    def send() -> None:
+        lines = b"".join(outgoing)
+        outgoing.clear()
+        write(lines)
+
+    def reply(_: "asyncio.Future[Dict[str, Any]]") -> None:
+        while waiting and waiting[0].done():
+            if not outgoing:
+                loop.call_soon(send)
+            outgoing.append(_encode(waiting.popleft().result()))
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        future = desk.submit_line(line)
+        waiting.append(future)
+        future.add_done_callback(reply)
+        if drain is not None:
+            await drain()
+    if waiting:
+        await asyncio.wait(waiting)
+    # let the last scheduled send run
+    await asyncio.sleep(0)
+
+
+async def start_server(
+    desk: FrontDesk,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    path: Optional[str] = None,
+) -> asyncio.Server:
+    """Start serving desk over TCP on host:port, or over the unix socket path when given."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await serve_lines(desk, reader, writer.write, writer.drain)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # thousands of desk clients may connect at once
+    if path is not None:
+        return await asyncio.start_unix_server(handle, path, backlog=4096)
+    return await asyncio.start_server(handle, host, port, backlog=4096)
+
+
+async def serve_stdio(desk: FrontDesk) -> None:
+    """Serve desk over stdin and stdout until stdin is closed."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+    )
+
+    def write(data: bytes) -> None:
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
+    await serve_lines(desk, reader, write)
+
+
+async def _persist(store: HotelStore, snapshot_every: float) -> None:
+    """Flush the transition log every second and snapshot every snapshot_every seconds."""
+    loop = asyncio.get_running_loop()
+    last_snapshot = loop.time()
+    while True:
+        await asyncio.sleep(1)
+        store.flush()
+        if loop.time() - last_snapshot >= snapshot_every:
+            store.snapshot()
+            last_snapshot = loop.time()
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    compact = args.floors > 100000
+    store = None
+    if args.data:
+        store = HotelStore(args.data)
+        hotel = store.open(args.floors, compact=compact)
+        persist = asyncio.create_task(_persist(store, args.snapshot_every))
+    else:
+        hotel = Hotel(args.floors, compact=compact)
+    desk = FrontDesk(hotel)
+    try:
+        if args.stdio:
+            await serve_stdio(desk)
+            return
+        server = await start_server(desk, args.host, args.port, args.unix)
+        async with server:
+            for sock in server.sockets:
+                print(f"serving on {sock.getsockname()}", file=sys.stderr)
+            await server.serve_forever()
+    finally:
+        if store is not None:
+            persist.cancel()
+            store.snapshot()
+            store.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--floors", type=int, default=100, help="number of floor")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="serve on this unix socket path instead")
+    parser.add_argument("--stdio", action="store_true", help="serve stdin/stdout")
+    parser.add_argument("--data", help="directory to persist the hotel in")
+    parser.add_argument(
+        "--snapshot-every", type=float, default=300, help="seconds between snapshots"
+    )
+    try:
+        asyncio.run(_serve(parser.parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
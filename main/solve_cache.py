@@ -0,0 +1,173 @@
+"""Content addressed infection solve cache module"""
+import os
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from main import instrumentation
+from main.loader import GridBuffer, is_grid_buffer
+from main.main import VirusMapBfs
+from main.virus_parallel import Solver
+
+# bytes charged per cached answer on top of its key and answer text
+ENTRY_OVERHEAD = 64
+
+
+def flat_cells(m: int, n: int, matrix: Union[List[List[int]], GridBuffer]) -> bytes:
+    """Immutable copy of the M x N room values row by row."""
+    if is_grid_buffer(matrix):
+        return bytes(matrix[: m * n])
+    return b"".join(bytes(row) for row in matrix)
+
+
+def _symmetries(m: int, n: int, cells: bytes) -> Iterator[Tuple[int, int, bytes]]:
+    """Lazily yield the map under its 8 rotations and reflections, as (M, N, cells)."""
+    yield m, n, cells
+    yield m, n, cells[::-1]
+    flipped = b"".join(cells[row * n : (row + 1) * n] for row in range(m - 1, -1, -1))
+    yield m, n, flipped
+    yield m, n, flipped[::-1]
+    del flipped
+    transposed = b"".join(cells[col::n] for col in range(n))
+    yield n, m, transposed
+    yield n, m, transposed[::-1]
+    flipped = b"".join(
+        transposed[row * m : (row + 1) * m] for row in range(n - 1, -1, -1)
+    )
+    del transposed
+    yield n, m, flipped
+    yield n, m, flipped[::-1]
+
+
+def cache_key(m: int, n: int, cells: bytes, symmetric: bool = False) -> bytes:
+    """
+    blake2b digest of (M, N, room values).
+
+    With symmetric, the smallest of the 8 rotations and reflections of the map is
+    hashed, so mirrored and rotated maps share a key, they have the same answer. The
+    variants are built one at a time so at most 4 copies of the map are alive, the
+    key still costs about 9x the plain hash.
+    """
+    if symmetric:
+        m, n, cells = min(_symmetries(m, n, cells))
+    digest = blake2b(digest_size=16)
+    digest.update(m.to_bytes(8, "little") + n.to_bytes(8, "little"))
+    digest.update(cells)
+    return digest.digest()
+
+
+class SolveCache:
+    """
+    Memoized solve of infection maps keyed by the content of the map.
+
+    Answers are kept in an LRU bounded by max_bytes and optionally in a directory with
+    one file per key, which survives restarts and is shared between processes. The
+    solver always gets its own copy of the map, so a solver mutating its matrix never
+    touches the caller's map, and the cache never keeps a reference to either.
+
+    Parameters:
+        max_bytes <int>: memory budget of the LRU, keys and answers included (optional, default to 16MB)
+
+        directory <str>: directory of the on-disk tier (optional, default to memory only)
+
+        solver <type>: VirusMap family class solving the misses (optional, default to VirusMapBfs)
+
+        symmetric <bool>: share answers between rotated and mirrored maps, each lookup then builds the 8 variants of the map (optional, default to False)
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 16 << 20,
+        directory: Optional[Union[str, os.PathLike]] = None,
+        solver: Solver = VirusMapBfs,
+        symmetric: bool = False,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.solver = solver
+        self.symmetric = symmetric
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._answers: "OrderedDict[bytes, str]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def solve(self, m: int, n: int, matrix: Union[List[List[int]], GridBuffer]) -> str:
+        """Same answer as solver(m, n, matrix).solve(), computed once per distinct map."""
+        cells = flat_cells(m, n, matrix)
+        key = cache_key(m, n, cells, self.symmetric)
+        answer = self._answers.get(key)
+        if answer is not None:
+            self._answers.move_to_end(key)
+            self.hits += 1
+            self._count("SolveCache.hit")
+            return answer
+        answer = self._read_disk(key)
+        if answer is not None:
+            self.disk_hits += 1
+            self._count("SolveCache.disk_hit")
+        else:
+            self.misses += 1
+            self._count("SolveCache.miss")
+            answer = self.solver(m, n, cells).solve()
+            self._write_disk(key, answer)
+        self._store(key, answer)
+        return answer
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._answers),
+            "bytes": self.size,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        """Drop the in memory answers, the on-disk tier and the counters are kept."""
+        self._answers.clear()
+        self.size = 0
+
+    def _store(self, key: bytes, answer: str) -> None:
+        self._answers[key] = answer
+        self.size += _entry_size(key, answer)
+        while self.size > self.max_bytes and self._answers:
+            old_key, old_answer = self._answers.popitem(last=False)
+            self.size -= _entry_size(old_key, old_answer)
+            self.evictions += 1
+
+    def _path(self, key: bytes) -> str:
+        return os.path.join(os.fspath(self.directory or ""), key.hex())
+
+    def _read_disk(self, key: bytes) -> Optional[str]:
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key: bytes, answer: str) -> None:
+        if self.directory is None:
+            return
+        temporary = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            f.write(answer)
+        os.replace(temporary, self._path(key))
+
+    @staticmethod
+    def _count(name: str) -> None:
+        if instrumentation.active is not None:
+            instrumentation.active.count(name)
+
+
+def _entry_size(key: bytes, answer: str) -> int:
+    return len(key) + len(answer) + ENTRY_OVERHEAD
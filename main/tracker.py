@@ -0,0 +1,190 @@
+"""Incremental infection time tracker module"""
+import heapq
+from collections import Counter, deque
+from typing import Deque, List, Set, Tuple, Union
+
+from main.exceptions import GridValueException
+from main.loader import GridBuffer
+from main.main import VirusMapBfs
+
+# infection time of an empty room or a guest the virus can never reach
+UNREACHED = -1
+
+
+class InfectionTracker:
+    """
+    Stateful infection time map that is repaired in place after single room changes.
+
+    The infection time of a room is its BFS distance to the nearest infected guest,
+    computed once with VirusMapBfs. set_cell then only revisits the rooms whose time
+    can change: a new guest or infected guest relaxes times outwards, a guest leaving
+    or recovering invalidates the rooms that depended on it and recomputes only those
+    from their still valid neighbours. A histogram of infection times keeps solve O(1).
+
+    Parameters:
+        m <int>: number of row
+
+        n <int>: number of column
+
+        matrix <List[List[int]] | bytes>: hotel map as rows or flat buffer, 0 is empty room, 1 is healthy guest, 2 is infected guest
+    """
+
+    def __init__(
+        self, m: int, n: int, matrix: Union[List[List[int]], GridBuffer]
+    ) -> None:
+        self.m = m
+        self.n = n
+        self._width = n + 2
+        bfs = VirusMapBfs(m, n, matrix)
+        self._grid = bfs._padded_grid()
+        self._times, self._unreached = bfs._spread()
+        levels = Counter(self._times)
+        levels.pop(UNREACHED, None)
+        self._max_level = max(levels, default=0)
+        self._level_count = [levels[level] for level in range(self._max_level + 1)]
+
+    def solve(self) -> str:
+        """Same answer as VirusMapBfs.solve on the current map, in O(1)."""
+        if self._unreached:
+            return "-1"
+        return str(self._max_level)
+
+    def infection_time(self, row: int, col: int) -> int:
+        """Unit_time the room gets infected, 0 for infected guest and -1 if never infected."""
+        return self._times[(row + 1) * self._width + col + 1]
+
+    def infection_times(self) -> List[List[int]]:
+        """Return the infection time of every room, same as VirusMapBfs.infection_times."""
+        width = self._width
+        return [
+            self._times[(row + 1) * width + 1 : (row + 1) * width + 1 + self.n].tolist()
+            for row in range(self.m)
+        ]
+
+    def set_cell(self, row: int, col: int, value: int) -> None:
+        """Set room (row, col) to value (0, 1, 2) and repair the affected infection times."""
+        if value not in (0, 1, 2):
+            raise GridValueException(row + 1, value)
+        if not (0 <= row < self.m and 0 <= col < self.n):
+            raise IndexError(
+                f"room ({row}, {col}) is outside the {self.m}x{self.n} map"
+            )
+        room = (row + 1) * self._width + col + 1
+        old = self._grid[room]
+        if old == value:
+            return
+        if old == 2 or value == 0:
+            self._raise_times(room, value)
+        else:
+            self._lower_times(room, value)
+
+    def _neighbours(self, room: int) -> Tuple[int, int, int, int]:
+        return room - self._width, room + self._width, room - 1, room + 1
+
+    def _forget(self, room: int) -> None:
+        """Remove the room from the histogram, must be paired with _record."""
+        if not self._grid[room]:
+            return
+        time = self._times[room]
+        if time == UNREACHED:
+            self._unreached -= 1
+            return
+        self._level_count[time] -= 1
+        if time == self._max_level:
+            while self._max_level and not self._level_count[self._max_level]:
+                self._max_level -= 1
+
+    def _record(self, room: int) -> None:
+        if not self._grid[room]:
+            return
+        time = self._times[room]
+        if time == UNREACHED:
+            self._unreached += 1
+            return
+        while len(self._level_count) <= time:
+            self._level_count.append(0)
+        self._level_count[time] += 1
+        if time > self._max_level:
+            self._max_level = time
+
+    def _lower_times(self, room: int, value: int) -> None:
+        """Room became occupied or infected, times can only decrease, relax outwards."""
+        grid, times = self._grid, self._times
+        self._forget(room)
+        grid[room] = value
+        if value == 2:
+            times[room] = 0
+        else:
+            reached = [
+                times[n] for n in self._neighbours(room) if grid[n] and times[n] >= 0
+            ]
+            times[room] = min(reached) + 1 if reached else UNREACHED
+        self._record(room)
+        if times[room] == UNREACHED:
+            return
+        frontier: Deque[int] = deque([room])
+        while frontier:
+            current = frontier.popleft()
+            time = times[current] + 1
+            for neighbour in self._neighbours(current):
+                if grid[neighbour] == 1 and (
+                    times[neighbour] == UNREACHED or times[neighbour] > time
+                ):
+                    self._forget(neighbour)
+                    times[neighbour] = time
+                    self._record(neighbour)
+                    frontier.append(neighbour)
+
+    def _raise_times(self, room: int, value: int) -> None:
+        """Room lost its guest or its infection, times can only increase."""
+        grid, times = self._grid, self._times
+        self._forget(room)
+        grid[room] = value
+        # rooms whose every shortest path went through an invalid room, found in time order
+        invalid: Set[int] = {room}
+        frontier: Deque[int] = deque([room])
+        while frontier:
+            current = frontier.popleft()
+            time = times[current] + 1
+            for neighbour in self._neighbours(current):
+                if (
+                    grid[neighbour] != 1
+                    or neighbour in invalid
+                    or times[neighbour] != time
+                ):
+                    continue
+                supported = any(
+                    grid[parent] and parent not in invalid and times[parent] == time - 1
+                    for parent in self._neighbours(neighbour)
+                )
+                if not supported:
+                    invalid.add(neighbour)
+                    frontier.append(neighbour)
+        for current in invalid:
+            if current != room:
+                self._forget(current)
+            times[current] = UNREACHED
+        # recompute invalid rooms from their valid neighbours, shortest first
+        heap: List[Tuple[int, int]] = []
+        for current in invalid:
+            if grid[current] != 1:
+                continue
+            reached = [
+                times[n]
+                for n in self._neighbours(current)
+                if grid[n] and times[n] != UNREACHED
+            ]
+            if reached:
+                heap.append((min(reached) + 1, current))
+        heapq.heapify(heap)
+        while heap:
+            time, current = heapq.heappop(heap)
+            if times[current] != UNREACHED and times[current] <= time:
+                continue
+            times[current] = time
+            for neighbour in self._neighbours(current):
+                if neighbour in invalid and grid[neighbour] == 1:
+                    if times[neighbour] == UNREACHED or times[neighbour] > time + 1:
+                        heapq.heappush(heap, (time + 1, neighbour))
+        for current in invalid:
+            self._record(current)
@@ -0,0 +1,57 @@
+"""NumPy vectorized infection solver module, requires numpy"""
+from typing import List, Union
+
+import numpy as np
+
+from main.loader import GridBuffer, is_grid_buffer
+
+
+class VirusMapNumpy:
+    """
+    Multi-source infection solver that keeps the hotel map as a NumPy int8 array.
+
+    Each unit_time dilates the cells infected the day before by one room in the 4
+    directions with array shifts, masked by the cells that still hold a healthy guest.
+
+    Parameters:
+        m <int>: number of row
+
+        n <int>: number of column
+
+        matrix <List[List[int]] | bytes>: hotel map as rows or flat buffer, 0 is empty room, 1 is healthy guest, 2 is infected guest
+    """
+
+    def __init__(
+        self, m: int, n: int, matrix: Union[List[List[int]], GridBuffer]
+    ) -> None:
+        self.m = m
+        self.n = n
+        if is_grid_buffer(matrix):
+            cells = np.frombuffer(matrix, dtype=np.int8, count=m * n).copy()
+            self.matrix = cells.reshape(m, n)
+        else:
+            self.matrix = np.array(matrix, dtype=np.int8).reshape(m, n)
+        self.unit_time = 0
+
+    def solve(self) -> str:
+        healthy = self.matrix == 1
+        frontier = self.matrix == 2
+        if not frontier.any():
+            return "-1" if healthy.any() else "0"
+        spread = np.empty_like(healthy)
+        while True:
+            spread[...] = False
+            spread[1:] |= frontier[:-1]
+            spread[:-1] |= frontier[1:]
+            spread[:, 1:] |= frontier[:, :-1]
+            spread[:, :-1] |= frontier[:, 1:]
+            spread &= healthy
+            if not spread.any():
+                break
+            healthy &= ~spread
+            self.matrix[spread] = 2
+            frontier, spread = spread, frontier
+            self.unit_time += 1
+        if healthy.any():
+            return "-1"
+        return str(self.unit_time)
@@ -0,0 +1,264 @@
+"""Multi-process infection solver module"""
+import multiprocessing
+import os
+import time
+from array import array
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+from main.exceptions import WorkerException
+from main.loader import Grid, GridBuffer, is_grid_buffer
+from main.main import VirusMap, VirusMapBfs
+
+# infection time of a room that is empty, healthy or not infected yet
+NOT_INFECTED = -1
+
+MapInput = Union[Grid, Tuple[int, int, Union[List[List[int]], GridBuffer]]]
+Solver = Union[Type[VirusMap], Type[VirusMapBfs]]
+
+
+def _band_worker(
+    names: List[str],
+    m: int,
+    n: int,
+    first_row: int,
+    last_row: int,
+    index: int,
+    workers: int,
+    barrier,
+) -> None:
+    """Run _advance_band, a failing worker breaks the barrier so the other bands stop too."""
+    try:
+        _advance_band(names, m, n, first_row, last_row, index, workers, barrier)
+    except BaseException:
+        barrier.abort()
+        raise
+
+
+def _advance_band(
+    names: List[str],
+    m: int,
+    n: int,
+    first_row: int,
+    last_row: int,
+    index: int,
+    workers: int,
+    barrier,
+) -> None:
+    """
+    Advance the frontier of rows [first_row, last_row) one unit_time per barrier round.
+
+    A worker only writes rooms of its own band. The rows just outside the band are
+    read as a one row halo, a room there infected on the previous unit_time infects
+    the room next to it inside the band.
+    """
+    grid_shm, times_shm, counts_shm = [
+        shared_memory.SharedMemory(name=name) for name in names
+    ]
+    grid = grid_shm.buf
+    times = times_shm.buf.cast("i")
+    counts = counts_shm.buf.cast("q")
+    try:
+        low, high = first_row * n, last_row * n
+        band = bytes(grid[low:high])
+        frontier = []
+        room = band.find(2)
+        while room != -1:
+            frontier.append(low + room)
+            room = band.find(2, room + 1)
+        healthy_left = band.count(1)
+        unit_time = 0
+        while True:
+            unit_time += 1
+            # every band finished infecting rooms of unit_time - 1
+            barrier.wait()
+            infected = []
+            for room in frontier:
+                col = room % n
+                if room - n >= low and grid[room - n] == 1:
+                    grid[room - n] = 2
+                    times[room - n] = unit_time
+                    infected.append(room - n)
+                if room + n < high and grid[room + n] == 1:
+                    grid[room + n] = 2
+                    times[room + n] = unit_time
+                    infected.append(room + n)
+                if col != 0 and grid[room - 1] == 1:
+                    grid[room - 1] = 2
+                    times[room - 1] = unit_time
+                    infected.append(room - 1)
+                if col != n - 1 and grid[room + 1] == 1:
+                    grid[room + 1] = 2
+                    times[room + 1] = unit_time
+                    infected.append(room + 1)
+            for halo, step in ((low - n, n), (high, -n)):
+                if halo < 0 or halo >= m * n:
+                    continue
+                for room in range(halo, halo + n):
+                    if times[room] == unit_time - 1 and grid[room + step] == 1:
+                        grid[room + step] = 2
+                        times[room + step] = unit_time
+                        infected.append(room + step)
+            healthy_left -= len(infected)
+            # double buffered per unit_time parity so the next round never races a reader
+            slot = (unit_time % 2) * workers
+            counts[slot + index] = len(infected)
+            barrier.wait()
+            if not any(counts[slot : slot + workers]):
+                break
+            frontier = infected
+        counts[2 * workers + index] = healthy_left
+        counts[3 * workers + index] = unit_time - 1
+    finally:
+        del grid, times, counts
+        for shm in (grid_shm, times_shm, counts_shm):
+            shm.close()
+
+
+class VirusMapParallel:
+    """
+    Multi-process infection solver over row bands held in shared memory.
+
+    The map and the per room infection time live in multiprocessing.shared_memory. Each
+    worker process owns a band of rows, advances its own frontier and reads the one
+    row halo of its neighbour bands every unit_time. A global barrier ends each unit_time
+    and every worker stops on the first unit_time where no band infected anybody.
+
+    Parameters:
+        m <int>: number of row
+
+        n <int>: number of column
+
+        matrix <List[List[int]] | bytes>: hotel map as rows or flat buffer, 0 is empty room, 1 is healthy guest, 2 is infected guest
+
+        workers <int>: number of worker process (optional, default to cpu count)
+
+        barrier_timeout <float>: seconds a worker waits for the other bands to end a unit_time before giving up (optional, default to 60)
+    """
+
+    def __init__(
+        self,
+        m: int,
+        n: int,
+        matrix: Union[List[List[int]], GridBuffer],
+        workers: Optional[int] = None,
+        barrier_timeout: float = 60.0,
+    ) -> None:
+        self.m = m
+        self.n = n
+        if is_grid_buffer(matrix):
+            self.cells = bytes(matrix[: m * n])
+        else:
+            self.cells = b"".join(bytes(row) for row in matrix)
+        self.workers = max(1, min(workers or os.cpu_count() or 1, m))
+        self.barrier_timeout = barrier_timeout
+        self.unit_time = 0
+
+    def solve(self) -> str:
+        m, n, workers = self.m, self.n, self.workers
+        grid_shm = shared_memory.SharedMemory(create=True, size=m * n)
+        times_shm = shared_memory.SharedMemory(create=True, size=m * n * 4)
+        counts_shm = shared_memory.SharedMemory(create=True, size=4 * workers * 8)
+        try:
+            grid_shm.buf[: m * n] = self.cells
+            times = array("i", [NOT_INFECTED]) * (m * n)
+            room = self.cells.find(2)
+            while room != -1:
+                times[room] = 0
+                room = self.cells.find(2, room + 1)
+            times_shm.buf[: m * n * 4] = times.tobytes()
+            # a worker killed before it can abort the barrier still releases the others
+            barrier = multiprocessing.Barrier(workers, timeout=self.barrier_timeout)
+            names = [grid_shm.name, times_shm.name, counts_shm.name]
+            bounds = [m * i // workers for i in range(workers + 1)]
+            processes = [
+                multiprocessing.Process(
+                    target=_band_worker,
+                    args=(names, m, n, bounds[i], bounds[i + 1], i, workers, barrier),
+                )
+                for i in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            exitcodes = [process.exitcode for process in processes]
+            if any(exitcodes):
+                raise WorkerException(f"worker exit codes {exitcodes}")
+            counts = counts_shm.buf.cast("q")
+            healthy_left = sum(counts[2 * workers : 3 * workers])
+            self.unit_time = counts[3 * workers]
+            del counts
+        finally:
+            for shm in (grid_shm, times_shm, counts_shm):
+                shm.close()
+                shm.unlink()
+        if healthy_left:
+            return "-1"
+        return str(self.unit_time)
+
+
+def compare_with_bfs(
+    m: int,
+    n: int,
+    matrix: Union[List[List[int]], GridBuffer],
+    workers: Optional[int] = None,
+) -> Dict[str, Union[str, float]]:
+    """Solve the same map with VirusMapBfs and VirusMapParallel, returns both answers, timings and speedup."""
+    start = time.perf_counter()
+    bfs_answer = VirusMapBfs(m, n, matrix).solve()
+    bfs_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    parallel_answer = VirusMapParallel(m, n, matrix, workers).solve()
+    parallel_seconds = time.perf_counter() - start
+    return {
+        "bfs_answer": bfs_answer,
+        "parallel_answer": parallel_answer,
+        "bfs_seconds": bfs_seconds,
+        "parallel_seconds": parallel_seconds,
+        "speedup": bfs_seconds / parallel_seconds,
+    }
+
+
+def _compact_payload(
+    virus_map: MapInput, solver: Solver
+) -> Tuple[Solver, int, int, bytes]:
+    """Flatten a map to (solver, M, N, room bytes) so workers unpickle one bytes object."""
+    m, n, matrix = virus_map
+    if is_grid_buffer(matrix):
+        cells = bytes(matrix[: m * n])
+    else:
+        cells = b"".join(bytes(row) for row in matrix)
+    return solver, m, n, cells
+
+
+def _solve_payload(payload: Tuple[Solver, int, int, bytes]) -> str:
+    solver, m, n, cells = payload
+    return solver(m, n, cells).solve()
+
+
+def solve_many(
+    maps: Iterable[MapInput],
+    workers: Optional[int] = None,
+    chunksize: int = 16,
+    solver: Solver = VirusMapBfs,
+) -> Iterator[str]:
+    """
+    Solve many maps over a process pool, yielding each answer in input order.
+
+    Parameters:
+        maps <Iterable[(m, n, matrix) | Grid]>: maps to solve, matrix as rows or flat buffer
+
+        workers <int>: number of worker process, 1 solves in this process (optional, default to cpu count)
+
+        chunksize <int>: number of maps sent to a worker at once (optional, default to 16)
+
+        solver <type>: VirusMap family class to solve each map with (optional, default to VirusMapBfs)
+    """
+    payloads = (_compact_payload(virus_map, solver) for virus_map in maps)
+    if workers == 1:
+        for payload in payloads:
+            yield _solve_payload(payload)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(_solve_payload, payloads, chunksize)
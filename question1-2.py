@@ -1,20 +1,17 @@
-from typing import List
+from itertools import chain
 
+from main.loader import read_text_grid
 from main.main import VirusMap
 
 
 def interactive_input():
     sentinel = "#"
     input1 = input("Please key in M N value (space seperated):")
-    matrix = []
     print(
-        "Please key in hotel matrix (room is seperated by space, floor by new line, end matrix with # in new line):"
+        "Please key in the M floors of the hotel matrix (room is seperated by space, floor by new line), the answer is printed after the last floor:"
     )
-    for line in iter(input, sentinel):
-        row = line.split(" ")
-        matrix.append([int(v) for v in row])
-    m, n = [eval(i) for i in input1.split(" ")]
-    print(VirusMap(m, n, matrix).solve())
+    grid = read_text_grid(chain([input1], iter(input, sentinel)), sentinel)
+    print(VirusMap(grid.m, grid.n, grid.cells).solve())
 
 
 def main_sample():
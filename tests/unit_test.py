@@ -1,16 +1,50 @@
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from itertools import islice
+
 import pytest
+from benchmarks.bench import bench_hotel, find_regressions
+from benchmarks.generators import make_grid, make_hotel
+from benchmarks.load_client import percentile, run_load
+from main import instrumentation, virus_parallel
+from main.concurrent_hotel import ConcurrentHotel
 from main.exceptions import (
     CheckInException,
     CheckOutException,
     CleanException,
     FloorCountException,
+    GridSizeException,
+    GridValueException,
     RepairException,
     RepairedException,
+    ReservationException,
     RoomCountException,
     RoomStatusException,
+    SnapshotException,
+    WorkerException,
 )
 
-from main.main import Hotel, Room, VirusMap, VirusMapBfs
+from main.loader import (
+    Grid,
+    grid_rows,
+    load_grid,
+    read_text_grid,
+    write_binary_grid,
+)
+from main.main import Hotel, Room, VirusMap, VirusMapBfs, room_number
+from main.persistence import LOG_FILE, HotelStore
+from main.reservations import ReservationBook
+from main.service import FrontDesk, start_server
+from main.solve_cache import SolveCache, cache_key, flat_cells
+from main.tracker import InfectionTracker
+from main.virus_bits import VirusMapBits
+from main.virus_parallel import VirusMapParallel, compare_with_bfs, solve_many
 
 
 class TestHotel:
@@ -91,6 +125,32 @@ class TestHotel:
         )
         assert hotel.assign_room() is None
 
+    def test_assign_room_fill_order(self):
+        hotel = Hotel(3)
+        assigned = [hotel.assign_room() for i in range(15)]
+        assert assigned[:6] == ["1A", "1B", "1C", "1D", "1E", "2E"]
+        assert assigned[10:] == ["3A", "3B", "3C", "3D", "3E"]
+        assert hotel.assign_room() is None
+
+    def test_assign_room_after_clean(self):
+        hotel = Hotel(2)
+        for i in range(10):
+            hotel.assign_room()
+        room = hotel.get_room("2C")
+        room.check_out()
+        assert hotel.assign_room() is None
+        room.clean()
+        hotel.get_room("1D").check_out()
+        hotel.get_room("1D").clean()
+        assert hotel.assign_room() == "1D"
+        assert hotel.assign_room() == "2C"
+        assert hotel.assign_room() is None
+
+    def test_assign_room_direct_check_in(self):
+        hotel = Hotel(1)
+        hotel.get_room("1A").check_in()
+        assert hotel.assign_room() == "1B"
+
     def test_list_available_rooms(self):
         hotel = Hotel(4)
         hotel2 = Hotel(4)
@@ -120,6 +180,30 @@ class TestHotel:
         assert hotel.list_available_rooms() == expected_list
         assert hotel2.list_available_rooms() == expected_list[1:]
 
+    def test_list_available_rooms_pagination(self):
+        hotel = Hotel(4)
+        hotel.get_room("2B").check_in()
+        hotel.get_room("3A").check_in()
+        expected = [i for i in Hotel(4).list_available_rooms() if i not in ["2B", "3A"]]
+        assert hotel.list_available_rooms(limit=3) == expected[:3]
+        assert hotel.list_available_rooms(limit=4, offset=7) == expected[7:11]
+        assert hotel.list_available_rooms(offset=9) == expected[9:]
+        assert hotel.list_available_rooms(offset=18) == []
+        assert hotel.list_available_rooms(limit=0) == []
+
+    def test_list_available_rooms_follow_transition(self):
+        hotel = Hotel(2)
+        for i in range(10):
+            hotel.assign_room()
+        assert hotel.list_available_rooms() == []
+        for num in ["2A", "1E", "2D"]:
+            hotel.get_room(num).check_out()
+            hotel.get_room(num).clean()
+        assert hotel.list_available_rooms() == ["1E", "2D", "2A"]
+        rooms = hotel.iter_available_rooms(offset=1)
+        assert next(rooms) == "2D"
+        assert list(rooms) == ["2A"]
+
     def test_get_room(self):
         hotel = Hotel(110)
         nums = ["1", "01", "11", "111", "A", "AA", "1AA", "10F", "10AA", "111E"]
@@ -129,6 +213,249 @@ class TestHotel:
         assert isinstance(hotel.get_room("02B"), Room)
         assert isinstance(hotel.get_room("110E"), Room)
 
+    def test_get_room_number(self):
+        hotel = Hotel(12)
+        assert hotel.get_room("12C").number == "12C"
+        assert hotel.get_room("002D").number == "2D"
+        assert hotel.get_room("7A") is hotel.get_room("7A")
+
+    def test_get_room_trailing_newline(self):
+        hotel = Hotel(12)
+        assert hotel.get_room("1A\n").number == "1A"
+        assert hotel.get_room("12E\n").number == "12E"
+        for num in ["1A\n\n", "\n1A", "1A ", "1\nA", "13A\n"]:
+            assert hotel.get_room(num) is None
+
+    def test_batch_with_huge_floor_number(self):
+        hotel = Hotel(2, [["Occupied"] * 5, ["Available"] * 5])
+        huge = "9" * 5000 + "A"
+        assert hotel.check_out_many(["1A", huge, "1B"]) == [True, False, True]
+        assert hotel.get_rooms([huge, "0" * 5000 + "2A"])[0] is None
+        assert hotel.get_rooms(["0" * 5000 + "2A"])[0].number == "2A"
+        assert hotel.get_room("2" * 5000 + "AB") is None
+
+    def test_get_rooms(self):
+        hotel = Hotel(3)
+        rooms = hotel.get_rooms(["1A", "4A", "3E", "3F", ""])
+        assert [room.number if room else None for room in rooms] == [
+            "1A",
+            None,
+            "3E",
+            None,
+            None,
+        ]
+
+    def test_compact_hotel(self):
+        statuses = [
+            [TestHotel.status[1] for i in range(5)],
+            [TestHotel.status[2], TestHotel.status[0]] + [TestHotel.status[3]] * 3,
+        ]
+        hotel = Hotel(2, statuses, compact=True)
+        assert hotel._rooms is None
+        assert hotel.list_available_rooms() == ["2B"]
+        room = hotel.get_room("2A")
+        assert room.number == "2A"
+        assert room.status == "Vacant"
+        assert room.clean()
+        assert hotel.get_room("2A").status == "Available"
+        assert hotel.assign_room() == "2B"
+        assert hotel.get_room("2B").status == "Occupied"
+        with pytest.raises(RoomStatusException):
+            Hotel(1, [["Available"] * 4 + ["Invalid"]], compact=True)
+
+    def test_room_view_shares_status(self):
+        hotel = Hotel(3)
+        room = hotel.get_room("3D")
+        room.check_in()
+        assert hotel.get_room("3D").status == "Occupied"
+        assert "3D" not in hotel.list_available_rooms()
+        assert not hasattr(room, "__dict__")
+
+    def test_assign_rooms(self):
+        hotel = Hotel(2)
+        hotel.get_room("1B").check_in()
+        assert hotel.assign_rooms(3) == ["1A", "1C", "1D"]
+        assert hotel.assign_rooms(0) == []
+        assert hotel.assign_rooms(10) == ["1E", "2E", "2D", "2C", "2B", "2A"]
+        assert hotel.assign_rooms(1) == []
+
+    def test_batch_transitions(self):
+        hotel = Hotel(2)
+        hotel.assign_rooms(4)
+        assert hotel.check_out_many(["1A", "1B", "1E", "9A", "1C"]) == [
+            True,
+            True,
+            False,
+            False,
+            True,
+        ]
+        assert hotel.get_room("1B").status == "Vacant"
+        assert hotel.repair_many(["1A", "1A"]) == [True, False]
+        assert hotel.clean_many(["1A", "1B", "1C"]) == [False, True, True]
+        assert hotel.repaired_many(["1A", "1B"]) == [True, False]
+        assert hotel.get_room("1A").status == "Vacant"
+        assert hotel.list_available_rooms(limit=3) == ["1B", "1C", "1E"]
+
+    def test_status_code_buffer(self):
+        rng = random.Random(7)
+        codes = bytearray(rng.randrange(4) for _ in range(5 * 37))
+        rooms = [
+            [TestHotel.status[code] for code in codes[i : i + 5]]
+            for i in range(0, len(codes), 5)
+        ]
+        hotel = Hotel(37, codes)
+        expected = Hotel(37, rooms)
+        assert hotel.list_available_rooms() == expected.list_available_rooms()
+        floor_order = [[f"{f}{c}" for c in "ABCDE"] for f in range(1, 38)]
+        in_entrance_order = [
+            room
+            for f, floor in enumerate(floor_order)
+            for room in (floor if f % 2 == 0 else floor[::-1])
+            if expected.get_room(room).status == "Available"
+        ]
+        assert hotel.list_available_rooms() == in_entrance_order
+        assert hotel.get_room("5C").status == rooms[4][2]
+        with pytest.raises(RoomStatusException):
+            Hotel(1, b"\x00\x01\x02\x03\x04")
+        with pytest.raises(FloorCountException):
+            Hotel(2, bytes(5))
+
+    def test_stats(self):
+        hotel = Hotel(3)
+        assert hotel.stats() == {
+            "Available": 15,
+            "Occupied": 0,
+            "Vacant": 0,
+            "Repair": 0,
+        }
+        hotel.assign_rooms(7)
+        hotel.get_room("1A").check_out()
+        hotel.check_out_many(["1B"])
+        hotel.get_room("1B").repair()
+        assert hotel.stats() == {
+            "Available": 8,
+            "Occupied": 5,
+            "Vacant": 1,
+            "Repair": 1,
+        }
+        assert hotel.stats(1) == {
+            "Available": 0,
+            "Occupied": 3,
+            "Vacant": 1,
+            "Repair": 1,
+        }
+        assert hotel.stats(2)["Occupied"] == 2
+        assert hotel.stats(3)["Available"] == 5
+        with pytest.raises(IndexError):
+            hotel.stats(4)
+        with pytest.raises(IndexError):
+            hotel.stats(0)
+
+    def test_stats_match_scan(self):
+        rng = random.Random(11)
+        codes = bytearray(rng.randrange(4) for _ in range(5 * 23))
+        for hotel in (Hotel(23, codes), ConcurrentHotel(23, codes, lock_count=3)):
+            ops = [hotel.check_out_many, hotel.clean_many, hotel.repair_many]
+            for _ in range(200):
+                rng.choice(ops)([f"{rng.randint(1, 23)}{rng.choice('ABCDE')}"])
+                hotel.assign_rooms(rng.randrange(3))
+            for floor in (None, *range(1, 24)):
+                floors = range(1, 24) if floor is None else [floor]
+                statuses = [
+                    hotel.get_room(f"{f}{c}").status for f in floors for c in "ABCDE"
+                ]
+                assert hotel.stats(floor) == {
+                    status: statuses.count(status)
+                    for status in TestHotel.status.values()
+                }
+
+    def test_lazy_hotel(self):
+        hotel = Hotel(10**9, lazy=True)
+        assert hotel._rooms is None and not hotel._statuses
+        assert hotel.stats()["Available"] == 5 * 10**9
+        assert hotel.list_available_rooms(limit=2, offset=5 * 10**9 - 1) == [
+            "1000000000A"
+        ]
+        assert hotel.get_room("777777777D").status == "Available"
+        with pytest.raises(ValueError):
+            Hotel(1, [["Available"] * 5], lazy=True)
+
+    def test_lazy_matches_dense(self):
+        rng = random.Random(5)
+        lazy, dense = Hotel(40, lazy=True), Hotel(40)
+        for _ in range(300):
+            k = rng.randrange(4)
+            assert lazy.assign_rooms(k) == dense.assign_rooms(k)
+            nums = [f"{rng.randint(1, 40)}{rng.choice('ABCDE')}" for _ in range(3)]
+            op = rng.choice(["check_out_many", "clean_many", "repair_many"])
+            assert getattr(lazy, op)(nums) == getattr(dense, op)(nums)
+            room = nums[0]
+            if dense.get_room(room).status == "Repair":
+                assert (
+                    lazy.get_room(room).repaired() and dense.get_room(room).repaired()
+                )
+        assert lazy.list_available_rooms() == dense.list_available_rooms()
+        assert lazy.list_available_rooms(limit=5, offset=17) == (
+            dense.list_available_rooms(limit=5, offset=17)
+        )
+        assert lazy.stats() == dense.stats()
+        assert [lazy.stats(f) for f in range(1, 41)] == [
+            dense.stats(f) for f in range(1, 41)
+        ]
+        assert lazy._status_buffer() == dense._statuses
+
+    def test_assign_block(self):
+        hotel = Hotel(3)
+        hotel.get_room("1B").check_in()
+        assert hotel.assign_block(3) == ["1C", "1D", "1E"]
+        assert hotel.assign_block(2) == ["2E", "2D"]
+        assert hotel.assign_block(1) == ["1A"]
+        hotel.get_room("3C").check_in()
+        assert hotel.assign_block(4) == []
+        assert hotel.assign_block(3) == ["2C", "2B", "2A"]
+        assert hotel.assign_block(2) == ["3A", "3B"]
+        assert hotel.assign_block(0) == [] and hotel.assign_block(6) == []
+        hotel.check_out_many(["2D", "2C"])
+        hotel.clean_many(["2D", "2C"])
+        assert hotel.assign_block(2) == ["2D", "2C"]
+        assert hotel.list_available_rooms() == ["3D", "3E"]
+
+    def test_assign_block_matches_scan(self):
+        rng = random.Random(9)
+        codes = bytearray(rng.choice([0, 0, 1]) for _ in range(5 * 30))
+        hotels = [
+            Hotel(30, codes),
+            ConcurrentHotel(30, codes, lock_count=4),
+            Hotel(30, lazy=True),
+        ]
+        hotels[2].check_in_many(
+            [room_number(slot) for slot, code in enumerate(codes) if code]
+        )
+        for _ in range(60):
+            k = rng.randint(1, 5)
+            available = set(hotels[0].list_available_rooms())
+            expected = []
+            for floor in range(1, 31):
+                cols = "ABCDE" if floor % 2 else "EDCBA"
+                for start in range(6 - k):
+                    run = [f"{floor}{c}" for c in cols[start : start + k]]
+                    if available.issuperset(run):
+                        expected = run
+                        break
+                if expected:
+                    break
+            for hotel in hotels:
+                assert hotel.assign_block(k) == expected
+            if rng.random() < 0.5:
+                nums = rng.sample(sorted(available), min(3, len(available)))
+                for hotel in hotels:
+                    hotel.check_in_many(nums)
+            nums = [f"{rng.randint(1, 30)}{rng.choice('ABCDE')}" for _ in range(4)]
+            for hotel in hotels:
+                hotel.check_out_many(nums)
+                hotel.clean_many(nums)
+        assert len({tuple(h.list_available_rooms()) for h in hotels}) == 1
+
 
 class TestRoom:
     def test_room_creation(self):
@@ -236,6 +563,57 @@ class TestVirusMap:
         matrix = [[1, 1, 1, 1, 1], [1, 0, 0, 0, 0], [1, 1, 1, 1, 2]]
         assert VirusMap(m, n, matrix).solve() == "10"
 
+    def test_snake_corridor(self):
+        m = 41
+        n = 60
+        matrix = [[1] * n for i in range(m)]
+        for row in range(1, m, 2):
+            matrix[row] = [0] * n
+            matrix[row][n - 1 if row % 4 == 1 else 0] = 1
+        matrix[0][0] = 2
+        expected = str((m // 2 + 1) * n + m // 2 - 1)
+        assert VirusMap(m, n, matrix).solve() == expected
+
+    def test_large_infected_region(self):
+        m = 200
+        n = 200
+        matrix = [[2] * n for i in range(m)]
+        matrix[m - 1][n - 1] = 1
+        assert VirusMap(m, n, matrix).solve() == "1"
+
+    def test_queries_share_one_map(self):
+        matrix = [[2, 1, 1, 1, 1]]
+        virus_map = VirusMap(1, 5, matrix)
+        assert virus_map.infected_by(2) == 3
+        assert virus_map.first_infection_day(0, 0) == 0
+        assert virus_map.solve() == "4"
+        assert virus_map.infected_by(0) == 1
+        assert virus_map.first_infection_day(0, 4) == 4
+        assert virus_map.solve() == "4"
+        assert matrix == [[2, 1, 1, 1, 1]]
+
+    def test_is_fully_reachable(self):
+        matrix = [[2, 1, 0, 1], [0, 1, 0, 1], [1, 1, 0, 0]]
+        virus_map = VirusMap(3, 4, matrix)
+        assert not virus_map.is_fully_reachable()
+        assert virus_map.component_labels() == [
+            [1, 1, 0, 2],
+            [0, 1, 0, 2],
+            [1, 1, 0, 0],
+        ]
+        matrix[1][3] = 2
+        assert VirusMap(3, 4, matrix).is_fully_reachable()
+        assert VirusMap(2, 2, [[0, 0], [0, 0]]).is_fully_reachable()
+
+    def test_precheck_matches_simulation(self):
+        rng = random.Random(5)
+        for _ in range(300):
+            m, n = rng.randint(1, 8), rng.randint(1, 8)
+            cells = bytes(rng.choice((0, 1, 1, 1, 2)) for _ in range(m * n))
+            reachable = VirusMapBfs(m, n, cells).is_fully_reachable()
+            assert reachable == (VirusMapBfs(m, n, cells)._spread()[1] == 0)
+            assert VirusMap(m, n, cells).solve() == VirusMapBfs(m, n, cells).solve()
+
 
 class TestVirusMapBfs:
     def test_sample_question(self):
@@ -273,3 +651,757 @@ class TestVirusMapBfs:
         n = 5
         matrix = [[1, 1, 1, 1, 1], [1, 0, 0, 0, 0], [1, 1, 1, 1, 2]]
         assert VirusMapBfs(m, n, matrix).solve() == "10"
+
+    def test_infection_times(self):
+        matrix = [[2, 1, 0, 2, 1], [1, 1, 1, 1, 1], [1, 0, 0, 2, 1]]
+        virus_map = VirusMapBfs(3, 5, matrix)
+        assert virus_map.infection_times() == [
+            [0, 1, -1, 0, 1],
+            [1, 2, 2, 1, 2],
+            [2, -1, -1, 0, 1],
+        ]
+        assert virus_map.solve() == "2"
+        assert matrix[0][1] == 1
+
+    def test_infection_times_unreachable(self):
+        matrix = [[2, 0, 1], [1, 0, 1]]
+        assert VirusMapBfs(2, 3, matrix).infection_times() == [[0, -1, -1], [1, -1, -1]]
+
+    def test_simulate(self):
+        matrix = [[2, 1, 0, 2, 1], [1, 1, 1, 1, 1], [1, 0, 0, 2, 1]]
+        days = list(VirusMapBfs(3, 5, matrix).simulate())
+        assert [day for day, rooms in days] == [0, 1, 2]
+        assert sorted(days[0][1]) == [(0, 0), (0, 3), (2, 3)]
+        assert sorted(days[2][1]) == [(1, 1), (1, 2), (1, 4), (2, 0)]
+        assert [sorted(rooms) for day, rooms in VirusMap(3, 5, matrix).simulate()] == [
+            sorted(rooms) for day, rooms in days
+        ]
+
+    def test_time_bounded_queries(self):
+        matrix = [[1, 1, 1, 1, 1], [1, 0, 0, 0, 0], [1, 1, 1, 1, 2]]
+        virus_map = VirusMapBfs(3, 5, matrix)
+        assert virus_map.infected_by(0) == 1
+        assert virus_map.infected_by(3) == 4
+        assert virus_map.infected_by(100) == 11
+        assert virus_map.first_infection_day(0, 4) == 10
+        assert virus_map.first_infection_day(1, 1) == -1
+        assert VirusMap(3, 5, matrix).infected_by(3) == 4
+
+    def test_simulate_is_lazy(self):
+        n = 10**6
+        matrix = bytearray([1]) * n
+        matrix[0] = 2
+        assert VirusMapBfs(1, n, matrix).infected_by(2) == 3
+
+    def test_long_corridor(self):
+        n = 5000
+        matrix = [[1] * n]
+        matrix[0][0] = 2
+        assert VirusMapBfs(1, n, matrix).solve() == str(n - 1)
+
+    def test_unreachable_wing_skips_bfs(self):
+        grid = make_grid("unreachable", 60, 80, seed=1)
+        virus_map = VirusMapBfs(grid.m, grid.n, grid.cells)
+        probe = instrumentation.enable()
+        try:
+            assert virus_map.solve() == "-1"
+        finally:
+            instrumentation.disable()
+        assert "VirusMapBfs.cells_visited" not in probe.counters
+        labels = virus_map.component_labels()
+        assert len({label for row in labels for label in row} - {0}) >= 2
+
+
+class TestVirusMapNumpy:
+    cases = [
+        ([[2, 1, 0, 2, 1], [1, 1, 1, 1, 1], [1, 0, 0, 2, 1]], "2"),
+        ([[1, 1, 0, 1, 1], [1, 1, 1, 1, 1], [1, 0, 0, 1, 1]], "-1"),
+        ([[2, 0, 0, 1, 1], [0, 1, 1, 1, 1], [1, 0, 0, 1, 1]], "-1"),
+        ([[1, 0, 0, 2, 1], [0, 1, 1, 1, 1], [1, 0, 0, 2, 1]], "-1"),
+        ([[2, 0, 0, 2, 2], [0, 2, 2, 2, 2], [2, 0, 0, 2, 2]], "0"),
+        ([[1, 1, 1, 1, 1], [1, 0, 0, 0, 0], [1, 1, 1, 1, 2]], "10"),
+    ]
+
+    @pytest.mark.parametrize("matrix,expected", cases)
+    def test_same_as_bfs(self, matrix, expected):
+        pytest.importorskip("numpy")
+        from main.virus_numpy import VirusMapNumpy
+
+        assert VirusMapNumpy(3, 5, matrix).solve() == expected
+        assert VirusMapBfs(3, 5, [row[:] for row in matrix]).solve() == expected
+
+    def test_empty_map(self):
+        pytest.importorskip("numpy")
+        from main.virus_numpy import VirusMapNumpy
+
+        assert VirusMapNumpy(2, 2, [[0, 0], [0, 0]]).solve() == "0"
+
+
+class TestVirusMapBits:
+    @pytest.mark.parametrize("matrix,expected", TestVirusMapNumpy.cases)
+    def test_same_as_bfs(self, matrix, expected):
+        assert VirusMapBits(3, 5, matrix).solve() == expected
+
+    def test_no_wrap_between_rows(self):
+        assert VirusMapBits(2, 3, [[0, 0, 2], [1, 0, 0]]).solve() == "-1"
+        assert VirusMapBits(2, 3, [[0, 0, 1], [2, 0, 0]]).solve() == "-1"
+        assert VirusMapBits(1, 1, [[1]]).solve() == "-1"
+
+    def test_flat_buffer(self):
+        virus_map = VirusMapBits(2, 4, bytes([2, 1, 1, 1, 0, 0, 0, 1]))
+        assert virus_map.healthy_count() == 4
+        assert virus_map.solve() == "4"
+        assert virus_map.healthy_count() == 0
+
+
+class TestVirusMapParallel:
+    def test_same_as_bfs(self):
+        for matrix, expected in TestVirusMapNumpy.cases:
+            assert VirusMapParallel(3, 5, matrix, workers=2).solve() == expected
+
+    def test_infection_crosses_bands(self):
+        matrix = [[1, 1, 1, 1, 1, 1, 1, 1, 1, 2]]
+        matrix += [[0] * 9 + [1], [1] * 10, [1] + [0] * 9, [1] * 10]
+        report = compare_with_bfs(5, 10, matrix, workers=3)
+        assert report["parallel_answer"] == report["bfs_answer"] == "22"
+        assert report["speedup"] > 0
+
+    def test_dead_worker_raises(self, monkeypatch):
+        advance_band = virus_parallel._advance_band
+
+        def attach_fails_in_band_1(*args):
+            if args[5] == 1:
+                raise OSError("cannot attach shared memory")
+            advance_band(*args)
+
+        monkeypatch.setattr(virus_parallel, "_advance_band", attach_fails_in_band_1)
+        virus_map = VirusMapParallel(4, 5, [[2, 1, 1, 1, 1]] * 4, workers=2)
+        # the failing band aborts the barrier, the timeout is only a safety net here
+        virus_map.barrier_timeout = 30
+        start = time.perf_counter()
+        with pytest.raises(WorkerException):
+            virus_map.solve()
+        assert time.perf_counter() - start < 10
+
+    def test_solve_many(self):
+        maps = [(3, 5, matrix) for matrix, expected in TestVirusMapNumpy.cases] * 5
+        maps.append(Grid(1, 3, bytes([2, 1, 1])))
+        expected = [expected for matrix, expected in TestVirusMapNumpy.cases] * 5
+        assert list(solve_many(maps, workers=2, chunksize=4)) == expected + ["2"]
+        assert list(solve_many(maps, workers=1, solver=VirusMap)) == expected + ["2"]
+
+
+class TestInfectionTracker:
+    def test_initial_answer(self):
+        for matrix, expected in TestVirusMapNumpy.cases:
+            assert InfectionTracker(3, 5, matrix).solve() == expected
+
+    def test_set_cell(self):
+        matrix = [[1, 1, 1, 1, 1], [1, 0, 0, 0, 0], [1, 1, 1, 1, 2]]
+        tracker = InfectionTracker(3, 5, matrix)
+        assert tracker.solve() == "10"
+        tracker.set_cell(0, 0, 2)
+        assert tracker.solve() == "4"
+        assert tracker.infection_time(1, 0) == 1
+        tracker.set_cell(1, 0, 0)
+        assert tracker.solve() == "4"
+        tracker.set_cell(2, 4, 0)
+        assert tracker.solve() == "-1"
+        assert tracker.infection_time(2, 0) == -1
+        tracker.set_cell(1, 0, 1)
+        assert tracker.solve() == "5"
+        with pytest.raises(GridValueException):
+            tracker.set_cell(0, 0, 3)
+
+    def test_matches_full_solve(self):
+        rng = random.Random(13)
+        for trial in range(50):
+            m, n = rng.randint(1, 6), rng.randint(1, 6)
+            matrix = [
+                [rng.choice([0, 1, 1, 2]) for col in range(n)] for row in range(m)
+            ]
+            tracker = InfectionTracker(m, n, matrix)
+            for step in range(20):
+                row, col = rng.randrange(m), rng.randrange(n)
+                matrix[row][col] = rng.choice([0, 1, 1, 2])
+                tracker.set_cell(row, col, matrix[row][col])
+                virus_map = VirusMapBfs(m, n, matrix)
+                assert tracker.infection_times() == virus_map.infection_times()
+                assert tracker.solve() == virus_map.solve()
+
+
+class TestLoader:
+    text = "3 5\n2 1 0 2 1\n1 1 1 1 1\n1  0 0 2 1\n"
+
+    def test_read_text_grid(self):
+        grid = read_text_grid(TestLoader.text.splitlines())
+        assert (grid.m, grid.n) == (3, 5)
+        assert bytes(grid.cells) == bytes([2, 1, 0, 2, 1, 1, 1, 1, 1, 1, 1, 0, 0, 2, 1])
+        assert VirusMap(grid.m, grid.n, grid.cells).solve() == "2"
+        assert VirusMapBfs(grid.m, grid.n, grid.cells).solve() == "2"
+
+    def test_read_text_grid_sentinel(self):
+        grid = read_text_grid(["1 2", "1 2", "#", "garbage"])
+        assert bytes(grid.cells) == b"\x01\x02"
+
+    def test_invalid_text_grid(self):
+        with pytest.raises(GridSizeException):
+            read_text_grid(["__import__('os') 5"])
+        with pytest.raises(GridSizeException):
+            read_text_grid(["0 5"])
+        with pytest.raises(GridSizeException):
+            read_text_grid(["2 2", "1 1"])
+        with pytest.raises(GridSizeException):
+            read_text_grid(["1 3", "1 1"])
+        with pytest.raises(GridValueException):
+            read_text_grid(["1 3", "1 3 1"])
+        with pytest.raises(GridValueException):
+            read_text_grid(["1 2", "10 1"])
+
+    def test_load_text_file(self, tmp_path):
+        path = tmp_path / "map.txt"
+        path.write_text(TestLoader.text)
+        grid = load_grid(path)
+        assert VirusMapBfs(grid.m, grid.n, grid.cells).solve() == "2"
+        with open(path) as f:
+            assert bytes(load_grid(f).cells) == bytes(grid.cells)
+
+    def test_load_binary_file(self, tmp_path):
+        path = tmp_path / "map.bin"
+        write_binary_grid(path, Grid(3, 5, bytes([1] * 14 + [2])))
+        grid = load_grid(str(path))
+        assert isinstance(grid.cells, memoryview)
+        assert VirusMap(grid.m, grid.n, grid.cells).solve() == "6"
+        assert VirusMapBfs(grid.m, grid.n, grid.cells).solve() == "6"
+        assert bytes(grid.cells) == bytes([1] * 14 + [2])
+
+    def test_invalid_binary_file(self, tmp_path):
+        path = tmp_path / "map.bin"
+        write_binary_grid(path, Grid(2, 2, bytes([1, 1, 3, 1])))
+        with pytest.raises(GridValueException):
+            load_grid(path)
+        write_binary_grid(path, Grid(2, 2, bytes([1, 1, 1])))
+        with pytest.raises(GridSizeException):
+            load_grid(path)
+
+
+class TestBenchmarks:
+    def test_seeded_generators(self):
+        assert make_grid("sparse", 30, 40, seed=1) == make_grid(
+            "sparse", 30, 40, seed=1
+        )
+        assert VirusMapBfs(*make_grid("unreachable", 10, 10)).solve() == "-1"
+        assert VirusMapBfs(*make_grid("corridor", 5, 4)).solve() == "13"
+        hotel = make_hotel(100, 0.5, seed=2)
+        assert (
+            hotel.list_available_rooms()
+            == make_hotel(100, 0.5, seed=2).list_available_rooms()
+        )
+        assert 150 < len(hotel.list_available_rooms()) < 350
+
+    def test_assign_samples_only_free_rooms(self, monkeypatch):
+        repeats = []
+
+        def counting_time_per_op(op, repeat):
+            repeats.append(repeat)
+            return 1.0
+
+        monkeypatch.setattr("benchmarks.bench.time_per_op", counting_time_per_op)
+        results = bench_hotel(10, 0.0, 1000)
+        # get_room, list_available_rooms and stats, then 10 blocks of 3 and 50 rooms
+        assert repeats == [1000, 1000, 1000, 10, 50]
+        assert "assign_block" in results and "assign_room" in results
+        assert "assign_room" not in bench_hotel(10, 1.0, 1000)
+
+    def test_find_regressions(self):
+        baseline = {"metrics": {"a/10": 1.0, "b/10": 1.0, "c/10": 1.0}}
+        results = {"metrics": {"a/10": 1.1, "b/10": 1.5}}
+        regressions = find_regressions(results, baseline, 0.2)
+        assert len(regressions) == 1
+        assert regressions[0].startswith("b/10")
+
+
+class TestInstrumentation:
+    def test_disabled_by_default(self):
+        assert instrumentation.active is None
+        assert not hasattr(Hotel.assign_room, "__wrapped__")
+
+    def test_enable_and_disable(self):
+        probe = instrumentation.enable()
+        try:
+            hotel = Hotel(2)
+            hotel.assign_room()
+            hotel.get_room("1A")
+            VirusMap(3, 5, [[1, 1, 1, 1, 1], [1, 0, 0, 0, 0], [1, 1, 1, 1, 2]]).solve()
+        finally:
+            assert instrumentation.disable() is probe
+        snapshot = probe.snapshot()
+        assert snapshot["histograms"]["Hotel.assign_room"]["count"] == 1
+        assert snapshot["histograms"]["Hotel.get_room"]["count"] == 1
+        assert snapshot["series"]["VirusMap.frontier_size"] == [1] * 11
+        assert len(snapshot["series"]["VirusMap.day_seconds"]) == 11
+        assert snapshot["counters"]["VirusMap.cells_visited"] == 11
+        Hotel(1).assign_room()
+        assert probe.snapshot()["histograms"]["Hotel.assign_room"]["count"] == 1
+
+    def test_environment_variable(self):
+        code = "import main.main; from main import instrumentation; print(instrumentation.active is not None)"
+        env = dict(os.environ, TELEPATHY_INSTRUMENT="1")
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            env=env,
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        assert output.stdout.strip() == "True"
+
+
+class TestConcurrentHotel:
+    def run_threads(self, target, count=8):
+        interval = sys.getswitchinterval()
+        # switch threads as often as possible so any unlocked check-then-set races
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=target) for _ in range(count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+    def test_same_order_as_hotel(self):
+        statuses = make_hotel(37, 0.5, seed=3)._statuses
+        rooms = [
+            [
+                ["Available", "Occupied", "Vacant", "Repair"][c]
+                for c in statuses[i : i + 5]
+            ]
+            for i in range(0, len(statuses), 5)
+        ]
+        hotel = Hotel(37, rooms)
+        concurrent = ConcurrentHotel(37, rooms, lock_count=4)
+        assert concurrent.list_available_rooms() == hotel.list_available_rooms()
+        assert concurrent.list_available_rooms(limit=7, offset=30) == (
+            hotel.list_available_rooms(limit=7, offset=30)
+        )
+        assert concurrent.assign_rooms(12) == hotel.assign_rooms(12)
+        assert concurrent.assign_room() == hotel.assign_room()
+        assert concurrent.check_out_many(["1A", "2E", "99A"]) == (
+            hotel.check_out_many(["1A", "2E", "99A"])
+        )
+        assert concurrent.list_available_rooms() == hotel.list_available_rooms()
+
+    def test_iter_resumes_after_last_room(self):
+        hotel = ConcurrentHotel(120, lock_count=1)
+        assert hotel.assign_room() == "1A"
+        rooms = hotel.iter_available_rooms()
+        seen = list(islice(rooms, 256))
+        # a room before the resume point turns Available between chunks
+        assert hotel.check_out_many(["1A"]) == [True]
+        assert hotel.clean_many(["1A"]) == [True]
+        seen += list(rooms)
+        assert len(seen) == len(set(seen)) == 599
+        assert "1A" not in seen
+
+    def test_stress_assign_exactly_once(self):
+        hotel = ConcurrentHotel(400, lock_count=16)
+        assigned = []
+
+        def front_desk():
+            mine = []
+            while True:
+                room = hotel.assign_room()
+                if room is None:
+                    break
+                mine.append(room)
+            assigned.extend(mine)
+
+        self.run_threads(front_desk)
+        assert len(assigned) == 2000
+        assert len(set(assigned)) == 2000
+        assert hotel.list_available_rooms() == []
+
+    def test_stress_mixed_traffic(self):
+        hotel = ConcurrentHotel(60, lock_count=8)
+        check_ins = []
+
+        def guest_cycle():
+            mine = 0
+            for _ in range(300):
+                room = hotel.assign_room()
+                if room is None:
+                    continue
+                hotel.get_room(room).check_out()
+                hotel.clean_many([room])
+                mine += 1
+            check_ins.append(mine)
+
+        def racing_check_in():
+            room = hotel.get_room("30C")
+            for _ in range(300):
+                try:
+                    room.check_in()
+                    check_ins.append(1)
+                    hotel.check_out_many(["30C"])
+                    room.clean()
+                except CheckInException:
+                    pass
+
+        self.run_threads(lambda: (guest_cycle(), racing_check_in()))
+        assert sum(check_ins) > 0
+        # every room is Available again and the index agrees with the statuses
+        assert len(hotel.list_available_rooms()) == 300
+        assert hotel.list_available_rooms() == Hotel(60).list_available_rooms()
+
+    def test_room_check_in_once(self):
+        hotel = ConcurrentHotel(1)
+        room = hotel.get_room("1C")
+        wins = []
+
+        def grab():
+            try:
+                wins.append(room.check_in())
+            except CheckInException:
+                pass
+
+        self.run_threads(grab, count=16)
+        assert wins == [True]
+        assert "1C" not in hotel.list_available_rooms()
+
+
+class TestFrontDesk:
+    def test_coalesce_same_tick(self):
+        desk = FrontDesk(Hotel(2))
+
+        async def tick():
+            requests = [
+                {"id": 1, "op": "assign"},
+                {"id": 2, "op": "assign"},
+                {"id": 3, "op": "get", "room": "1A"},
+                {"id": 4, "op": "check_out", "room": "1A"},
+                {"id": 5, "op": "check_out", "room": "1C"},
+                {"id": 6, "op": "list", "limit": 2},
+                {"id": 7, "op": "list", "limit": 2},
+                {"id": 8, "op": "fly"},
+                {"id": 9, "op": "get"},
+            ]
+            return await asyncio.gather(*(desk.submit(r) for r in requests))
+
+        responses = asyncio.run(tick())
+        assert [r["id"] for r in responses] == list(range(1, 10))
+        assert [r["result"] for r in responses[:7]] == [
+            "1A",
+            "1B",
+            {"number": "1A", "status": "Occupied"},
+            True,
+            False,
+            ["1C", "1D"],
+            ["1C", "1D"],
+        ]
+        assert not responses[7]["ok"] and "fly" in responses[7]["error"]
+        assert not responses[8]["ok"]
+        # assign, get, check_out and list runs, the invalid requests never queue
+        assert desk.batches == 4
+
+    def test_bad_request_fails_alone(self):
+        hotel = Hotel(1, [["Occupied", "Available", "Occupied", "Vacant", "Vacant"]])
+        desk = FrontDesk(hotel)
+        huge = "9" * 5000 + "A"
+
+        async def tick():
+            requests = [
+                {"id": 1, "op": "get", "room": "1A"},
+                {"id": 2, "op": "get", "room": huge},
+                {"id": 3, "op": "check_out", "room": "1C"},
+                {"id": 4, "op": "check_out", "room": huge},
+                {"id": 5, "op": "check_out", "room": "1B"},
+                {"id": 6, "op": "list", "limit": 2},
+                {"id": 7, "op": "list", "limit": 10**30},
+                {"id": 8, "op": "list", "offset": -1},
+            ]
+            return await asyncio.wait_for(
+                asyncio.gather(*(desk.submit(r) for r in requests)), 5
+            )
+
+        responses = asyncio.run(tick())
+        assert [r["ok"] for r in responses] == [
+            True,
+            False,
+            True,
+            False,
+            True,
+            True,
+            False,
+            False,
+        ]
+        assert responses[0]["result"] == {"number": "1A", "status": "Occupied"}
+        assert responses[2]["result"] is True
+        assert responses[4]["result"] is False
+        assert responses[5]["result"] == ["1B"]
+        assert hotel.get_room("1C").status == "Vacant"
+
+    def test_failed_run_answers_its_requests_only(self, monkeypatch):
+        desk = FrontDesk(Hotel(1))
+
+        def broken_get_rooms(nums):
+            raise RuntimeError("index is corrupt")
+
+        monkeypatch.setattr(desk.hotel, "get_rooms", broken_get_rooms)
+
+        async def tick():
+            requests = [
+                {"id": 1, "op": "assign"},
+                {"id": 2, "op": "get", "room": "1A"},
+                {"id": 3, "op": "assign"},
+            ]
+            return await asyncio.wait_for(
+                asyncio.gather(*(desk.submit(r) for r in requests)), 5
+            )
+
+        responses = asyncio.run(tick())
+        assert [r["ok"] for r in responses] == [True, False, True]
+        assert responses[1]["error"] == "index is corrupt"
+        assert [responses[0]["result"], responses[2]["result"]] == ["1A", "1B"]
+
+    def test_service_json_lines(self):
+        async def session():
+            desk = FrontDesk(Hotel(1))
+            server = await start_server(desk)
+            async with server:
+                port = server.sockets[0].getsockname()[1]
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(
+                    b'{"id": 1, "op": "assign"}\n{"id": 2, "op": "assign"}\n'
+                    b"not json\n"
+                    b'{"id": 3, "op": "list"}\n'
+                )
+                writer.write_eof()
+                lines = [
+                    json.loads(line) for line in (await reader.read()).splitlines()
+                ]
+                writer.close()
+            return lines
+
+        lines = asyncio.run(session())
+        assert [line["id"] for line in lines] == [1, 2, None, 3]
+        assert lines[1]["result"] == "1B"
+        assert not lines[2]["ok"]
+        assert lines[3]["result"] == ["1C", "1D", "1E"]
+
+    def test_load_client(self):
+        async def load():
+            desk = FrontDesk(Hotel(10))
+            server = await start_server(desk)
+            async with server:
+                port = server.sockets[0].getsockname()[1]
+                results = await run_load("127.0.0.1", port, clients=40, cycles=5)
+            return desk, results
+
+        desk, results = asyncio.run(load())
+        assert results["requests"] == 40 * 5 * 3
+        assert 0 < results["p50"] <= results["p99"] <= results["max"]
+        assert desk.batches < results["requests"]
+        assert len(desk.hotel.list_available_rooms()) == 50
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        assert percentile(values, 0.5) == 50.0
+        assert percentile(values, 0.99) == 99.0
+        assert percentile([], 0.5) == 0.0
+
+
+class TestHotelStore:
+    def test_create_and_restore(self, tmp_path):
+        store = HotelStore(tmp_path)
+        hotel = store.open(3)
+        hotel.assign_rooms(4)
+        hotel.get_room("1B").check_out()
+        hotel.clean_many(["1B"])
+        store.close()
+        restored = HotelStore(tmp_path).open(compact=True)
+        assert restored.floor_count == 3
+        assert restored.list_available_rooms() == hotel.list_available_rooms()
+        assert restored.get_room("1A").status == "Occupied"
+
+    def test_snapshot_then_log_tail(self, tmp_path):
+        store = HotelStore(tmp_path)
+        hotel = store.open(2)
+        hotel.assign_rooms(3)
+        store.snapshot()
+        log_size = os.path.getsize(tmp_path / LOG_FILE)
+        hotel.check_out_many(["1A"])
+        hotel.repair_many(["1A"])
+        store.flush()
+        assert os.path.getsize(tmp_path / LOG_FILE) > log_size
+        store.close()
+        store = HotelStore(tmp_path)
+        restored = store.open()
+        assert restored.get_room("1A").status == "Repair"
+        assert restored.list_available_rooms() == [
+            "1D",
+            "1E",
+            "2E",
+            "2D",
+            "2C",
+            "2B",
+            "2A",
+        ]
+        # the restored hotel keeps logging
+        restored.assign_room()
+        store.close()
+        assert HotelStore(tmp_path).open().get_room("1D").status == "Occupied"
+
+    def test_torn_record_and_stale_log(self, tmp_path):
+        store = HotelStore(tmp_path)
+        store.open(1).assign_room()
+        store.close()
+        with open(tmp_path / LOG_FILE, "ab") as f:
+            f.write(b"\x01\x00")
+        store = HotelStore(tmp_path)
+        hotel = store.open()
+        assert hotel.list_available_rooms() == ["1B", "1C", "1D", "1E"]
+        hotel.assign_room()
+        store.close()
+        assert HotelStore(tmp_path).open().list_available_rooms() == ["1C", "1D", "1E"]
+        # a crash after the snapshot but before the new log leaves a stale log
+        stale = (tmp_path / LOG_FILE).read_bytes()
+        store = HotelStore(tmp_path)
+        store.open().assign_room()
+        store.snapshot()
+        store.close()
+        (tmp_path / LOG_FILE).write_bytes(stale)
+        assert HotelStore(tmp_path).open().list_available_rooms() == ["1D", "1E"]
+
+    def test_concurrent_hotel(self, tmp_path):
+        store = HotelStore(tmp_path)
+        hotel = store.open(50, ConcurrentHotel, lock_count=4)
+        threads = [
+            threading.Thread(target=hotel.assign_rooms, args=(20,)) for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.close()
+        restored = HotelStore(tmp_path).open(hotel_type=ConcurrentHotel)
+        assert isinstance(restored, ConcurrentHotel)
+        assert len(restored.list_available_rooms()) == 150
+
+    def test_errors(self, tmp_path):
+        with pytest.raises(SnapshotException):
+            HotelStore(tmp_path).open()
+        with pytest.raises(SnapshotException):
+            HotelStore(tmp_path).snapshot()
+        (tmp_path / "hotel.snapshot").write_bytes(b"nope")
+        with pytest.raises(SnapshotException):
+            HotelStore(tmp_path).open()
+
+
+class TestReservationBook:
+    def test_book_and_free(self):
+        book = ReservationBook(Hotel(2))
+        reservation = book.book("1A", 10, 13)
+        assert reservation.number == "1A"
+        assert not book.is_free("1A", 12, 20)
+        assert book.is_free("1A", 13, 20)
+        assert book.is_free("1A", 5, 10)
+        assert book.is_free("1B", 10, 13)
+        with pytest.raises(ReservationException):
+            book.book("1A", 9, 11)
+        book.book("1A", 13, 14)
+        book.book("1A", 5, 10)
+        assert [r.start for r in book.bookings(0, 100)] == [5, 10, 13]
+        book.cancel(reservation.id)
+        assert book.is_free("1A", 11, 12)
+        assert len(book) == 2
+        with pytest.raises(ReservationException):
+            book.cancel(reservation.id)
+        with pytest.raises(ReservationException):
+            book.book("3A", 1, 2)
+        with pytest.raises(ReservationException):
+            book.is_free("1A", 5, 5)
+
+    def test_nearest_free_snake_order(self):
+        hotel = Hotel(2)
+        book = ReservationBook(hotel)
+        rooms = [book.reserve(1, 5).number for _ in range(7)]
+        assert rooms == ["1A", "1B", "1C", "1D", "1E", "2E", "2D"]
+        assert book.nearest_free(3, 4) == "2C"
+        assert book.nearest_free(5, 9) == "1A"
+        assert book.free_rooms(0, 2) == ["2C", "2B", "2A"]
+        assert book.free_rooms(0, 1, limit=2) == ["1A", "1B"]
+        assert book.free_many(["1A", "2C", "2E"], 4, 6) == [False, True, False]
+        for _ in range(3):
+            book.reserve(2, 3)
+        assert book.reserve(2, 3) is None
+        assert book.nearest_free(2, 3) is None
+
+    def test_matches_scan(self):
+        rng = random.Random(3)
+        book = ReservationBook(Hotel(4))
+        rooms = [f"{f}{c}" for f in range(1, 5) for c in "ABCDE"]
+        booked = []
+        for _ in range(300):
+            start = rng.randrange(60)
+            end = start + rng.randint(1, 8)
+            if rng.random() < 0.5:
+                reservation = book.reserve(start, end)
+            else:
+                num = rng.choice(rooms)
+                overlap = any(
+                    r.number == num and r.start < end and start < r.end for r in booked
+                )
+                assert book.is_free(num, start, end) == (not overlap)
+                reservation = None if overlap else book.book(num, start, end)
+            if reservation is not None:
+                booked.append(reservation)
+            if booked and rng.random() < 0.2:
+                booked.remove(book.cancel(rng.choice(booked).id))
+        order = Hotel(4).list_available_rooms()
+        for start in range(0, 70, 3):
+            end = start + 4
+            busy = {r.number for r in booked if r.start < end and start < r.end}
+            assert book.free_rooms(start, end) == [r for r in order if r not in busy]
+
+
+class TestSolveCache:
+    matrix = [[0, 1, 1], [1, 2, 0], [0, 1, 0]]
+
+    def test_hits_and_no_alias(self):
+        cache = SolveCache()
+        matrix = [row[:] for row in self.matrix]
+        assert cache.solve(3, 3, matrix) == VirusMapBfs(3, 3, self.matrix).solve()
+        # the mutating solver got its own copy
+        assert matrix == self.matrix
+        assert cache.solve(3, 3, matrix) == "2"
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+        cache.solve(3, 3, make_grid("sparse", 3, 3, seed=1).cells)
+        assert cache.misses == 2 and len(cache) == 2
+
+    def test_mirrored_maps_share_a_key(self):
+        cells = flat_cells(3, 3, self.matrix)
+        mirrored = [row[::-1] for row in self.matrix]
+        transposed = [list(column) for column in zip(*self.matrix)]
+        key = cache_key(3, 3, cells, symmetric=True)
+        assert cache_key(3, 3, flat_cells(3, 3, mirrored), symmetric=True) == key
+        assert cache_key(3, 3, flat_cells(3, 3, transposed), symmetric=True) == key
+        assert cache_key(3, 3, flat_cells(3, 3, mirrored), symmetric=False) != (
+            cache_key(3, 3, cells, symmetric=False)
+        )
+        grid = make_grid("dense", 4, 7, seed=2)
+        rotated = [list(row) for row in zip(*grid_rows(4, 7, grid.cells)[::-1])]
+        assert SolveCache().solve(7, 4, rotated) == SolveCache().solve(4, 7, grid.cells)
+        cache = SolveCache(symmetric=True)
+        assert cache.solve(7, 4, rotated) == cache.solve(4, 7, grid.cells)
+        assert cache.hits == 1
+
+    def test_byte_eviction_and_disk_tier(self, tmp_path):
+        grids = [make_grid("dense", 5, 5, seed=seed) for seed in range(4)]
+        cache = SolveCache(max_bytes=200, directory=tmp_path)
+        answers = [cache.solve(5, 5, grid.cells) for grid in grids]
+        assert cache.size <= 200 and cache.evictions == len(grids) - len(cache)
+        restarted = SolveCache(directory=tmp_path)
+        assert [restarted.solve(5, 5, grid.cells) for grid in grids] == answers
+        assert restarted.disk_hits == len(grids) and restarted.misses == 0